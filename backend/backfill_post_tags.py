@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Normalise the sports_tags of posts written before tags were normalised.
+
+Tag search and trending match tags lowercase and without a leading "#", so
+a legacy post tagged "#Cricket" is invisible to a search for cricket and
+trends as its own tag. Posts are processed in _id order, in batches, and
+each update is guarded by the tags it was computed from, so the script can
+be stopped and re-run at any point: posts already normalised are skipped.
+
+Trending counts are loaded at startup, so restart the API afterwards.
+
+Usage:
+    python backfill_post_tags.py [--batch-size 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from pymongo import UpdateOne
+
+import server
+
+async def backfill_post_tags(batch_size, dry_run):
+    updated = 0
+    last_id = None
+
+    while True:
+        query = {"sports_tags.0": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await server.posts_collection.find(query, {"sports_tags": 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        updates = []
+        for doc in batch:
+            tags = server.normalize_tags(doc["sports_tags"])
+            if tags == doc["sports_tags"]:
+                continue
+            # Matching on the old tags leaves posts edited since the read alone
+            updates.append(UpdateOne({"_id": doc["_id"], "sports_tags": doc["sports_tags"]}, {"$set": {"sports_tags": tags}}))
+
+        if updates and not dry_run:
+            result = await server.posts_collection.bulk_write(updates, ordered=False)
+            updated += result.modified_count
+        else:
+            updated += len(updates)
+        print(f"   posts.sports_tags: {updated} normalised so far")
+
+    return updated
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="count posts that would be updated")
+    args = parser.parse_args()
+
+    print(f"🏷️  Normalising post sports tags{' (dry run)' if args.dry_run else ''}")
+    print("=" * 50)
+
+    server.connect_to_mongo()
+    updated = await backfill_post_tags(args.batch_size, args.dry_run)
+    print(f"✅ posts.sports_tags: {updated} normalised")
+
+    server.close_mongo_connection()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
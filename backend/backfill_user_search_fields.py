@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Fill in the search fields user typeahead and athlete discovery rely on.
+
+Users created before those endpoints existed have no search_terms,
+sport_terms or achievement_terms. Documents are processed in _id order, in
+batches, and each update is guarded by the values it was computed from, so
+the script can be stopped and re-run at any point. By default only users
+missing a field are touched; --all recomputes every user (e.g. after
+changing how terms are derived).
+
+--activity also rebuilds activity_score and last_active_at from each
+user's posts and comments. Run it once after deploying discovery, or after
+changing ACTIVITY_HALF_LIFE_DAYS or ACTIVITY_EPOCH.
+
+Usage:
+    python backfill_user_search_fields.py [--batch-size 1000] [--all] [--activity] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from pymongo import UpdateOne
+
+import server
+
+SOURCE_FIELDS = ["username", "full_name", "sports_interests", "achievements"]
+DERIVED_FIELDS = ["search_terms", "sport_terms", "achievement_terms"]
+
+def derive_fields(doc):
+    return {
+        "search_terms": server.user_search_terms(doc.get("username", ""), doc.get("full_name", "")),
+        "sport_terms": server.sport_terms(doc.get("sports_interests")),
+        "achievement_terms": server.achievement_terms(doc.get("achievements")),
+    }
+
+async def backfill_search_terms(batch_size, recompute_all, dry_run):
+    updated = 0
+    last_id = None
+
+    while True:
+        query = {} if recompute_all else {"$or": [{field: {"$exists": False}} for field in DERIVED_FIELDS]}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        projection = {field: 1 for field in SOURCE_FIELDS + DERIVED_FIELDS}
+        batch = await server.users_collection.find(query, projection).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        updates = []
+        for doc in batch:
+            fields = derive_fields(doc)
+            if all(doc.get(field) == value for field, value in fields.items()):
+                continue
+            # Matching on the inputs leaves users edited since the read alone
+            guard = {"_id": doc["_id"], **{field: doc.get(field) for field in SOURCE_FIELDS}}
+            updates.append(UpdateOne(guard, {"$set": fields}))
+
+        if updates and not dry_run:
+            result = await server.users_collection.bulk_write(updates, ordered=False)
+            updated += result.modified_count
+        else:
+            updated += len(updates)
+        print(f"   users search fields: {updated} updated so far")
+
+    return updated
+
+def activity_pipeline(weight):
+    """Per user: sum of weight * 2^((created_at - epoch) / half-life), and the latest created_at"""
+    half_life_ms = server.ACTIVITY_HALF_LIFE_DAYS * 86400 * 1000
+    age = {"$subtract": [{"$toDate": "$created_at"}, server.ACTIVITY_EPOCH]}
+    return [
+        {"$group": {
+            "_id": "$user_id",
+            "score": {"$sum": {"$multiply": [weight, {"$pow": [2, {"$divide": [age, half_life_ms]}]}]}},
+            "last_active_at": {"$max": "$created_at"},
+        }},
+    ]
+
+async def backfill_activity(batch_size, dry_run):
+    totals = {}
+    for collection, kind in ((server.posts_collection, "post"), (server.comments_collection, "comment")):
+        async for row in collection.aggregate(activity_pipeline(server.ACTIVITY_WEIGHTS[kind]), allowDiskUse=True):
+            score, last_active_at = totals.get(row["_id"], (0.0, None))
+            latest = row["last_active_at"] if last_active_at is None else max(last_active_at, row["last_active_at"])
+            totals[row["_id"]] = (score + row["score"], latest)
+
+    updated = 0
+    items = list(totals.items())
+    for offset in range(0, len(items), batch_size):
+        updates = [
+            UpdateOne({"id": user_id}, {"$set": {"activity_score": score, "last_active_at": last_active_at}})
+            for user_id, (score, last_active_at) in items[offset:offset + batch_size]
+        ]
+        if not dry_run:
+            result = await server.users_collection.bulk_write(updates, ordered=False)
+            updated += result.modified_count
+        else:
+            updated += len(updates)
+        print(f"   users.activity_score: {updated} updated so far")
+
+    # Users with no activity get an explicit zero: a missing score never matches
+    # the cursor's $lt, so they would be unreachable past the first page
+    if not dry_run:
+        result = await server.users_collection.update_many(
+            {"activity_score": {"$exists": False}}, {"$set": {"activity_score": 0.0}}
+        )
+        updated += result.modified_count
+    return updated
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="recompute users that already have search fields")
+    parser.add_argument("--activity", action="store_true", help="rebuild activity scores from posts and comments")
+    parser.add_argument("--dry-run", action="store_true", help="count users that would be updated")
+    args = parser.parse_args()
+
+    print(f"🔎 Backfilling user search fields{' (dry run)' if args.dry_run else ''}")
+    print("=" * 50)
+
+    server.connect_to_mongo()
+    updated = await backfill_search_terms(args.batch_size, args.all, args.dry_run)
+    print(f"✅ users search fields: {updated} updated")
+    if args.activity:
+        updated = await backfill_activity(args.batch_size, args.dry_run)
+        print(f"✅ users.activity_score: {updated} updated")
+
+    server.close_mongo_connection()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Athlete discovery latency and index use on synthetic athlete profiles.
+
+Seeds a scratch database with --athletes athletes (500k by default, plus a
+tenth as many fans and scouts) carrying the discovery fields, builds the
+users indexes from server.INDEX_SPECS, then runs GET /api/discover/athletes'
+query path (server.athlete_discovery_query + server.discover_athlete_page)
+for each filter combination. Reports p50/p95 for the first page and for
+the first --depth pages fetched by following cursors, plus the index the planner
+chose and keys/documents examined for the first page. Needs a running
+MongoDB at MONGO_URL; the scratch database is dropped afterwards unless
+--keep is given.
+
+Usage:
+    python benchmarks/bench_athlete_discovery.py [--athletes 500000] [--page 20] [--depth 5] [--repeat 10] [--keep]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+SPORTS = ["Cricket", "Football", "Hockey", "Kabaddi", "Badminton", "Athletics", "Wrestling", "Boxing", "Table Tennis", "Chess"]
+ACHIEVEMENTS = ["State champion", "National gold medal", "District runner-up", "University team captain",
+                "Asian Games bronze", "Junior national record", "Ranji Trophy debut", "Khelo India finalist"]
+
+def make_user(i, role, now, rng):
+    sports = rng.sample(SPORTS, k=rng.choice((1, 1, 2, 3)))
+    achievements = rng.sample(ACHIEVEMENTS, k=rng.choice((0, 1, 1, 2)))
+    last_active_at = now - timedelta(minutes=rng.expovariate(1 / (60 * 24 * 14)))
+    # A few recent activities, folded into the score the way record_activity does
+    score = sum(server.activity_growth(last_active_at - timedelta(days=rng.random() * 30)) for _ in range(rng.randint(0, 20)))
+    username = f"{role}_{i}"
+    return {
+        "id": str(uuid.uuid4()),
+        "username": username,
+        "email": f"{username}@example.com",
+        "role": role,
+        "full_name": f"{role.title()} {i}",
+        "profile_image": "",
+        "sports_interests": sports,
+        "achievements": achievements,
+        "sport_terms": server.sport_terms(sports),
+        "achievement_terms": server.achievement_terms(achievements),
+        "activity_score": score,
+        "last_active_at": server.to_mongo_datetime(last_active_at),
+    }
+
+async def seed(collection, athletes, batch_size=10000):
+    rng = random.Random(3)
+    now = datetime.now(timezone.utc)
+    roles = ["athlete"] * athletes + ["fan", "scout"] * (athletes // 20)
+    start = time.perf_counter()
+    for offset in range(0, len(roles), batch_size):
+        batch = [make_user(i, roles[i], now, rng) for i in range(offset, min(offset + batch_size, len(roles)))]
+        await collection.insert_many(batch, ordered=False)
+    print(f"Seeded {len(roles)} users ({athletes} athletes) in {time.perf_counter() - start:.1f} s")
+
+async def timed(fn, repeat):
+    await fn()  # warm the cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+async def pages(filters, page, depth):
+    cursor = None
+    for _ in range(depth):
+        athletes, cursor = await server.discover_athlete_page(server.athlete_discovery_query(**filters, cursor=cursor), page)
+        if cursor is None:
+            break
+    return athletes
+
+def winning_plan(explain):
+    """(index name, keys examined, docs examined) from a find explain"""
+    stats = explain["executionStats"]
+    stage = explain["queryPlanner"]["winningPlan"]
+    index = None
+    while stage:
+        index = stage.get("indexName", index)
+        stage = stage.get("inputStage") or (stage.get("inputStages") or [None])[0]
+    return index or "COLLSCAN", stats["totalKeysExamined"], stats["totalDocsExamined"]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--athletes", type=int, default=500000)
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=5, help="pages fetched by following cursors")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database", default="khelbhoomi_bench_discovery")
+    parser.add_argument("--keep", action="store_true", help="keep (and reuse) the seeded database")
+    args = parser.parse_args()
+
+    server.connect_to_mongo()
+    database = server.client[args.database]
+    server.users_collection = database.users
+    try:
+        if await database.users.count_documents({"role": "athlete"}) != args.athletes:
+            await database.users.drop()
+            await seed(database.users, args.athletes)
+        for collection_name, keys, options in server.INDEX_SPECS:
+            if collection_name == "users":
+                await database.users.create_index(keys, **options)
+
+        cases = {
+            "no filter": {},
+            "sport": {"sport": "kabaddi"},
+            "achievement": {"achievement": "gold"},
+            "sport + achievement": {"sport": "table tennis", "achievement": "national"},
+            "sport + active 7d": {"sport": "cricket", "active_within_days": 7},
+            "all filters": {"sport": "hockey", "achievement": "champion", "active_within_days": 3},
+        }
+        print(f"{'filters':>20}  {'page 1 p50/p95 (ms)':>20}  {f'pages 1-{args.depth} p50/p95':>18}  index (keys/docs examined)")
+        for name, filters in cases.items():
+            first = await timed(lambda: pages(filters, args.page, 1), args.repeat)
+            deep = await timed(lambda: pages(filters, args.page, args.depth), args.repeat)
+            explain = await database.users.find(server.athlete_discovery_query(**filters)).sort(
+                [("activity_score", -1), ("id", -1)]
+            ).limit(args.page + 1).explain()
+            index, keys, docs = winning_plan(explain)
+            print(f"{name:>20}  {first[0]:9.2f} / {first[1]:8.2f}  {deep[0]:8.2f} / {deep[1]:7.2f}  {index} ({keys}/{docs})")
+    finally:
+        if not args.keep:
+            await database.client.drop_database(args.database)
+        server.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
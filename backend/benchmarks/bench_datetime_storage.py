@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Read-path cost of ISO-string vs native datetime storage.
+
+Times what a feed request does per document after the driver returns it
+(parse_from_mongo followed by building a Post) for both DATETIME_STORAGE
+modes. No database is needed; documents are synthesised in memory.
+
+Usage:
+    python benchmarks/bench_datetime_storage.py [--posts 20000] [--repeat 5]
+"""
+
+import argparse
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+def make_posts(count, native):
+    now = datetime.now(timezone.utc)
+    posts = []
+    for i in range(count):
+        created_at = now - timedelta(minutes=i)
+        posts.append({
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "username": f"athlete_{i}",
+            "user_role": "athlete",
+            "content": "Morning session done, 10k in the bag",
+            "post_type": "text",
+            "image_url": None,
+            "video_url": None,
+            "sports_tags": ["running"],
+            "likes": 0,
+            "comments": 0,
+            "created_at": created_at if native else created_at.isoformat(),
+        })
+    return posts
+
+def read_path(posts):
+    for post_data in posts:
+        server.Post(**server.parse_from_mongo(dict(post_data)))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("iso", "native"):
+        server.DATETIME_STORAGE = mode
+        posts = make_posts(args.posts, native=(mode == "native"))
+        best = min(timeit.repeat(lambda: read_path(posts), number=1, repeat=args.repeat))
+        results[mode] = best
+        print(f"{mode:>6}: {best * 1000:8.1f} ms for {args.posts} posts ({best / args.posts * 1e6:.2f} us/post)")
+
+    saved = results["iso"] - results["native"]
+    print(f" saved: {saved / args.posts * 1e6:.2f} us/post ({saved / results['iso'] * 100:.1f}%)")
+
+if __name__ == "__main__":
+    main()
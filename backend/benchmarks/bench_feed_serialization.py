@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Feed page serialization: Pydantic models vs the lean JSON path.
+
+"models" is the previous GET /api/posts path: parse_from_mongo, a Post per
+document, then FastAPI validating and encoding the list against
+response_model=List[Post]. "lean" is server.serialize_posts on projected
+documents. No database is needed; documents are synthesised in memory.
+
+Usage:
+    python benchmarks/bench_feed_serialization.py [--pages 2000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+import server  # noqa: E402
+
+def make_page(size):
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "username": f"athlete_{i}",
+        "user_role": "athlete",
+        "content": "Match day! Scored twice in the district final " * 3,
+        "post_type": "text",
+        "image_url": None,
+        "video_url": None,
+        "sports_tags": ["football", "district"],
+        "likes": 12,
+        "comments": 3,
+        "created_at": server.to_mongo_datetime(now - timedelta(minutes=i)),
+    } for i in range(size)]
+
+async def models_path(page, response_field):
+    posts = [server.Post(**server.parse_from_mongo(dict(post_data))) for post_data in page]
+    content = await serialize_response(field=response_field, response_content=posts)
+    return JSONResponse(content).body
+
+async def lean_path(page, response_field):
+    return server.post_page_response(page, None).body
+
+async def time_path(path, page, response_field, pages):
+    start = time.perf_counter()
+    for _ in range(pages):
+        await path(page, response_field)
+    return (time.perf_counter() - start) / pages
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    route = next(r for r in server.app.routes if getattr(r, "path", None) == "/api/posts" and "GET" in r.methods)
+    print(f"DATETIME_STORAGE={server.DATETIME_STORAGE}, encoder={'orjson' if server.orjson else 'json'}")
+    for size in (20, 100):
+        page = make_page(size)
+        models = await time_path(models_path, page, route.response_field, args.pages)
+        lean = await time_path(lean_path, page, route.response_field, args.pages)
+        print(f"{size:>3} items: models {models * 1e6:8.1f} us/page, lean {lean * 1e6:8.1f} us/page ({models / lean:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Conversation list: materialised inbox vs aggregating raw messages.
+
+Seeds one user with thousands of conversations into a scratch database,
+then times the first page of "my conversations, newest first, with unread
+counts" read from the inbox collection (what GET /api/conversations does)
+against the equivalent $group over the messages collection. Needs a
+running MongoDB at MONGO_URL; the scratch database is dropped afterwards.
+
+Usage:
+    python benchmarks/bench_inbox.py [--conversations 5000] [--messages 10] [--page 20] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+def make_conversations(user_id, conversations, messages_per_conversation):
+    now = datetime.now(timezone.utc)
+    messages = []
+    inbox = []
+    for c in range(conversations):
+        peer_id = str(uuid.uuid4())
+        conversation_id = server.conversation_id_for(user_id, peer_id)
+        last = None
+        for m in range(messages_per_conversation):
+            from_peer = m % 2 == 0
+            last = {
+                "id": str(uuid.uuid4()),
+                "conversation_id": conversation_id,
+                "sender_id": peer_id if from_peer else user_id,
+                "sender_username": f"peer_{c}" if from_peer else "bench_user",
+                "recipient_id": user_id if from_peer else peer_id,
+                "recipient_username": "bench_user" if from_peer else f"peer_{c}",
+                "content": f"message {m} in conversation {c}",
+                "read": not from_peer or m < messages_per_conversation - 2,
+                "created_at": now - timedelta(minutes=c, seconds=messages_per_conversation - m),
+            }
+            messages.append(last)
+        inbox.append({
+            "user_id": user_id,
+            "conversation_id": conversation_id,
+            "peer_id": peer_id,
+            "peer_username": f"peer_{c}",
+            "last_message_id": last["id"],
+            "last_message_preview": last["content"],
+            "last_sender_id": last["sender_id"],
+            "last_message_at": last["created_at"],
+            "unread_count": sum(1 for m in messages[-messages_per_conversation:] if not m["read"] and m["recipient_id"] == user_id),
+        })
+    return messages, inbox
+
+async def read_inbox(database, user_id, page):
+    return await database.inbox.find({"user_id": user_id}, {"_id": 0}).sort(
+        [("last_message_at", -1), ("conversation_id", -1)]
+    ).limit(page).to_list(length=page)
+
+async def aggregate_messages(database, user_id, page):
+    pipeline = [
+        {"$match": {"$or": [{"sender_id": user_id}, {"recipient_id": user_id}]}},
+        {"$sort": {"created_at": -1}},
+        {"$group": {
+            "_id": "$conversation_id",
+            "last_message_at": {"$first": "$created_at"},
+            "last_message_preview": {"$first": "$content"},
+            "unread_count": {"$sum": {"$cond": [
+                {"$and": [{"$eq": ["$recipient_id", user_id]}, {"$eq": ["$read", False]}]}, 1, 0
+            ]}},
+        }},
+        {"$sort": {"last_message_at": -1, "_id": -1}},
+        {"$limit": page},
+    ]
+    return await database.messages.aggregate(pipeline, allowDiskUse=True).to_list(length=page)
+
+async def time_query(query, repeat):
+    await query()  # warm the cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await query()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=10, help="messages per conversation")
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database", default="khelbhoomi_bench_inbox")
+    args = parser.parse_args()
+
+    server.connect_to_mongo()
+    database = server.client[args.database]
+    await database.client.drop_database(args.database)
+    try:
+        for collection_name, keys, options in server.INDEX_SPECS:
+            if collection_name in ("messages", "inbox"):
+                await database[collection_name].create_index(keys, **options)
+        # What the aggregation needs to find a user's messages at all
+        await database.messages.create_index([("sender_id", 1), ("created_at", -1)])
+        await database.messages.create_index([("recipient_id", 1), ("created_at", -1)])
+
+        user_id = str(uuid.uuid4())
+        messages, inbox = make_conversations(user_id, args.conversations, args.messages)
+        await database.messages.insert_many(messages, ordered=False)
+        await database.inbox.insert_many(inbox, ordered=False)
+        print(f"Seeded {len(inbox)} conversations, {len(messages)} messages; first page of {args.page}, {args.repeat} runs")
+
+        results = {
+            "inbox": await time_query(lambda: read_inbox(database, user_id, args.page), args.repeat),
+            "aggregate": await time_query(lambda: aggregate_messages(database, user_id, args.page), args.repeat),
+        }
+        for name, (p50, p95) in results.items():
+            print(f"{name:>10}: p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+        print(f"inbox is {results['aggregate'][0] / results['inbox'][0]:.1f}x faster at p50")
+    finally:
+        await database.client.drop_database(args.database)
+        server.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Post search latency on a synthetic corpus.
+
+Seeds a scratch database with --posts synthetic posts (1M by default) built
+from a small sports vocabulary, builds the posts indexes from
+server.INDEX_SPECS, then times GET /api/search/posts' query path
+(server.search_post_page) for common, rare, tag-only and mixed queries: the
+first page, and the first --depth pages fetched by following cursors. An unindexed
+case-insensitive $regex scan is timed alongside for comparison. Needs a
+running MongoDB at MONGO_URL; the scratch database is dropped afterwards
+unless --keep is given (reseeding 1M posts takes a few minutes).
+
+Usage:
+    python benchmarks/bench_post_search.py [--posts 1000000] [--page 20] [--depth 5] [--repeat 10] [--keep]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+SPORTS = ["cricket", "football", "hockey", "kabaddi", "badminton", "athletics", "wrestling", "boxing", "tennis", "chess"]
+COMMON_WORDS = ["training", "match", "today", "session", "great", "team", "win", "practice", "morning", "coach"]
+RARE_WORDS = ["hattrick", "marathon", "olympiad", "comeback", "debut", "century", "knockout", "podium"]
+
+def make_post(i, now, rng):
+    words = rng.choices(COMMON_WORDS, k=rng.randint(4, 10))
+    if rng.random() < 0.02:
+        words.append(rng.choice(RARE_WORDS))
+    tags = rng.sample(SPORTS, k=rng.choice((0, 1, 1, 2)))
+    created_at = now - timedelta(seconds=i * 30)
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": f"user_{rng.randrange(50000)}",
+        "username": f"athlete_{rng.randrange(50000)}",
+        "user_role": "athlete",
+        "content": " ".join(words),
+        "post_type": "text",
+        "image_url": None,
+        "video_url": None,
+        "sports_tags": tags,
+        "likes": 0,
+        "comments": 0,
+        "created_at": server.to_mongo_datetime(created_at),
+    }
+
+async def seed(collection, count, batch_size=10000):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        batch = [make_post(i, now, rng) for i in range(offset, min(offset + batch_size, count))]
+        await collection.insert_many(batch, ordered=False)
+    print(f"Seeded {count} posts in {time.perf_counter() - start:.1f} s")
+
+async def timed(fn, repeat):
+    await fn()  # warm the cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+async def deep_page(text, tags, page, depth):
+    cursor = None
+    for _ in range(depth):
+        posts_data, cursor = await server.search_post_page(text, tags, page, cursor)
+        if cursor is None:
+            break
+    return posts_data
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=5, help="page number reached by following cursors")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database", default="khelbhoomi_bench_search")
+    parser.add_argument("--keep", action="store_true", help="keep (and reuse) the seeded database")
+    args = parser.parse_args()
+
+    server.connect_to_mongo()
+    database = server.client[args.database]
+    server.posts_collection = database.posts
+    try:
+        if await database.posts.estimated_document_count() != args.posts:
+            await database.posts.drop()
+            await seed(database.posts, args.posts)
+        start = time.perf_counter()
+        for collection_name, keys, options in server.INDEX_SPECS:
+            if collection_name == "posts":
+                await database.posts.create_index(keys, **options)
+        print(f"Indexes ready in {time.perf_counter() - start:.1f} s")
+
+        queries = {
+            "common word": ("training", []),
+            "rare word": ("hattrick", []),
+            "two words": ("morning session", []),
+            "tag only": ("", ["kabaddi"]),
+            "word + tag": ("coach", ["cricket"]),
+        }
+        print(f"{'query':>14}  {'first page p50/p95 (ms)':>24}  {f'pages 1-{args.depth} p50/p95 (ms)':>24}")
+        for name, (text, tags) in queries.items():
+            first = await timed(lambda: server.search_post_page(text, tags, args.page), args.repeat)
+            deep = await timed(lambda: deep_page(text, tags, args.page, args.depth), args.repeat)
+            print(f"{name:>14}  {first[0]:11.1f} / {first[1]:10.1f}  {deep[0]:12.1f} / {deep[1]:9.1f}")
+
+        regex = await timed(lambda: database.posts.find(
+            {"content": {"$regex": "hattrick", "$options": "i"}}, server.POST_PROJECTION
+        ).sort([("created_at", -1), ("id", -1)]).limit(args.page).to_list(length=args.page), args.repeat)
+        print(f"{'regex scan':>14}  {regex[0]:11.1f} / {regex[1]:10.1f}  (rare word, no ranking)")
+    finally:
+        if not args.keep:
+            await database.client.drop_database(args.database)
+        server.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+User typeahead latency on a synthetic user base.
+
+Seeds a scratch database with --users users (1M by default) carrying the
+search_terms GET /api/search/users queries, builds the users indexes from
+server.INDEX_SPECS, then replays random 1-6 character prefixes of real
+names, plus --miss-rate prefixes no name starts with, through
+server.find_user_suggestions (the uncached path) and through the endpoint
+function (short prefixes served from the cache). Reports p50 and p99 per
+prefix length, and fails if any suggestion has no term starting with its
+prefix. Needs a running MongoDB at MONGO_URL; the scratch database is
+dropped afterwards unless --keep is given.
+
+Usage:
+    python benchmarks/bench_user_search.py [--users 1000000] [--queries 2000] [--miss-rate 0.1] [--keep]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+FIRST_NAMES = ["Virat", "Rohit", "Neeraj", "Mary", "Saina", "Sunil", "Mithali", "Hima", "Bajrang", "Pullela",
+               "Anju", "Dhruv", "Smriti", "Sakshi", "Vinesh", "Lovlina", "Abhinav", "Jhulan", "Sachin", "Dipa"]
+LAST_NAMES = ["Sharma", "Chopra", "Kom", "Nehwal", "Chhetri", "Raj", "Das", "Punia", "Gopichand", "George",
+              "Jurel", "Mandhana", "Malik", "Phogat", "Borgohain", "Bindra", "Goswami", "Tendulkar", "Karmakar", "Singh"]
+
+def make_user(i, rng):
+    full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    username = f"{full_name.split()[0].lower()}_{i}"
+    return {
+        "id": str(uuid.uuid4()),
+        "username": username,
+        "email": f"{username}@example.com",
+        "role": rng.choice(["athlete", "scout", "fan"]),
+        "full_name": full_name,
+        "profile_image": "",
+        "search_terms": server.user_search_terms(username, full_name),
+    }
+
+async def seed(collection, count, batch_size=10000):
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        await collection.insert_many([make_user(i, rng) for i in range(offset, min(offset + batch_size, count))], ordered=False)
+    print(f"Seeded {count} users in {time.perf_counter() - start:.1f} s")
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+async def replay(fn, prefixes):
+    by_length = {}
+    for prefix in prefixes:
+        start = time.perf_counter()
+        await fn(prefix)
+        by_length.setdefault(len(prefix), []).append((time.perf_counter() - start) * 1000)
+    return by_length
+
+async def count_wrong_suggestions(prefixes):
+    wrong = 0
+    for prefix in set(prefixes):
+        for user in await server.find_user_suggestions(prefix, 10):
+            terms = server.user_search_terms(user["username"], user["full_name"])
+            if not any(term.startswith(prefix) for term in terms):
+                wrong += 1
+    return wrong
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--miss-rate", type=float, default=0.1, help="share of prefixes that match no user")
+    parser.add_argument("--database", default="khelbhoomi_bench_user_search")
+    parser.add_argument("--keep", action="store_true", help="keep (and reuse) the seeded database")
+    args = parser.parse_args()
+
+    server.connect_to_mongo()
+    database = server.client[args.database]
+    server.users_collection = database.users
+    try:
+        if await database.users.estimated_document_count() != args.users:
+            await database.users.drop()
+            await seed(database.users, args.users)
+        for collection_name, keys, options in server.INDEX_SPECS:
+            if collection_name == "users":
+                await database.users.create_index(keys, **options)
+
+        rng = random.Random(11)
+        names = [name.lower() for name in FIRST_NAMES + LAST_NAMES]
+        prefixes = [rng.choice(names)[:rng.randint(1, 6)] for _ in range(args.queries)]
+        # e.g. "kohlx": real names on both sides of it, but none starting with it
+        prefixes = [prefix + "qx" if rng.random() < args.miss_rate else prefix for prefix in prefixes]
+        wrong = await count_wrong_suggestions(prefixes)  # also warms the working set
+        if wrong:
+            print(f"❌ {wrong} suggestions have no term starting with their prefix")
+            return 1
+
+        uncached = await replay(lambda prefix: server.find_user_suggestions(prefix, 10), prefixes)
+        server.user_search_cache.clear()
+        endpoint = await replay(lambda prefix: server.search_users(prefix, 10), prefixes)
+
+        print(f"{'prefix length':>13}  {'queries':>7}  {'index p50/p99 (ms)':>19}  {'endpoint p50/p99 (ms)':>22}")
+        for length in sorted(uncached):
+            a, b = uncached[length], endpoint[length]
+            print(f"{length:>13}  {len(a):>7}  {percentile(a, 0.5):8.2f} / {percentile(a, 0.99):7.2f}"
+                  f"  {percentile(b, 0.5):10.2f} / {percentile(b, 0.99):8.2f}")
+        print(f"user_search_cache: {server.user_search_cache.stats()}")
+        return 0
+    finally:
+        if not args.keep:
+            await database.client.drop_database(args.database)
+        server.close_mongo_connection()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Precompute "who to follow" suggestions for every user.
+
+Candidates come from three places:
+  - users with similar sports: users are grouped by their exact set of
+    sports, and each group gets a shared pool of the most followed users
+    from its most similar groups. Groups are processed one at a time, and
+    Jaccard similarity to every other group is counted from the groups
+    sharing each of its sports. Memory stays linear in the number of sport
+    combinations, however many of those users create;
+  - the follow graph: accounts followed by the accounts a user follows,
+    counted per candidate ("mutual follows");
+  - the most followed accounts overall, so new users get suggestions too.
+Scouts and fans are only suggested athletes; athletes are suggested
+athletes and scouts. Candidates are scored as
+    SPORT_WEIGHT * jaccard + GRAPH_WEIGHT * mutual + POPULARITY_WEIGHT * followers
+(each term scaled to 0..1), already-followed accounts are removed, and the
+top --top-k are written to the suggestions collection, one document per
+user, replacing the previous run. Documents of users that no longer exist
+are removed at the end.
+
+Run it periodically (e.g. nightly from cron). GET /api/users/me/suggestions
+serves the result; following someone removes them from the stored list.
+
+Usage:
+    python compute_follow_suggestions.py [--top-k 20] [--batch-size 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from pymongo import ReplaceOne
+
+import server
+
+SPORT_WEIGHT = 0.5
+GRAPH_WEIGHT = 0.35
+POPULARITY_WEIGHT = 0.15
+# Similar sport groups drawn on per group, and users taken from each
+SIMILAR_GROUPS = 8
+POOL_PER_GROUP = 50
+# Followees expanded per user for follow-graph candidates
+MAX_FOLLOWEES_EXPANDED = 200
+# Mutual follow count that earns the full graph score
+MUTUAL_FOLLOWS_SATURATION = 10
+
+ROLES = [server.UserRole.ATHLETE, server.UserRole.SCOUT, server.UserRole.FAN]
+# Role code -> role codes that may be suggested to it
+SUGGESTED_ROLES = {0: [0, 1], 1: [0], 2: [0]}
+
+async def load_users():
+    users = await server.users_collection.find(
+        {}, {"_id": 0, "id": 1, "username": 1, "full_name": 1, "role": 1, "profile_image": 1, "sport_terms": 1, "sports_interests": 1}
+    ).to_list(length=None)
+    profiles = await server.profile_collection.find({}, {"_id": 0, "user_id": 1, "followers_count": 1}).to_list(length=None)
+    followers = {profile["user_id"]: profile.get("followers_count", 0) for profile in profiles}
+    for user in users:
+        if "sport_terms" not in user:
+            user["sport_terms"] = server.sport_terms(user.get("sports_interests"))
+        user["followers_count"] = followers.get(user["id"], 0)
+    return users
+
+async def load_follow_graph(index_of):
+    """Follow edges as CSR arrays: followees of user i are followees[indptr[i]:indptr[i + 1]]"""
+    edges = await server.follows_collection.find({}, {"_id": 0, "follower_id": 1, "followee_id": 1}).to_list(length=None)
+    pairs = [(index_of[e["follower_id"]], index_of[e["followee_id"]]) for e in edges
+             if e["follower_id"] in index_of and e["followee_id"] in index_of]
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    order = np.argsort(pairs[:, 0], kind="stable")
+    followees = pairs[order, 1]
+    indptr = np.zeros(len(index_of) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=len(index_of)), out=indptr[1:])
+    return indptr, followees
+
+def sport_groups(users):
+    """Group index per user, each group's sports, the groups holding each sport, and the sports vocabulary"""
+    vocabulary = sorted({term for user in users for term in user["sport_terms"]})
+    column = {term: i for i, term in enumerate(vocabulary)}
+    keys = [tuple(sorted({column[term] for term in user["sport_terms"]})) for user in users]
+    distinct = sorted(set(keys))
+    group_of = {key: i for i, key in enumerate(distinct)}
+    holders = [[] for _ in vocabulary]
+    for i, key in enumerate(distinct):
+        for sport in key:
+            holders[sport].append(i)
+    postings = [np.array(groups, dtype=np.int64) for groups in holders]
+    return np.array([group_of[key] for key in keys], dtype=np.int64), distinct, postings, vocabulary
+
+def group_similarity(key, group_sizes, postings):
+    """Jaccard similarity between the group with sports `key` and every group.
+
+    Only groups sharing a sport get a non-zero intersection, so this costs
+    the total length of key's posting lists plus one pass over the groups.
+    """
+    hits = [postings[sport] for sport in key]
+    intersection = np.bincount(np.concatenate(hits), minlength=len(group_sizes)) if hits else np.zeros(len(group_sizes))
+    union = len(key) + group_sizes - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, intersection / union, 0.0)
+
+def group_members(group, role, popularity, groups):
+    """Per (group, role code) the group's most followed users, and per role code the most followed overall"""
+    role_count = len(ROLES)
+    # One sort by (group, role, most followed first) puts each member list in a contiguous slice
+    order = np.lexsort((-popularity, role, group))
+    bounds = np.searchsorted(group[order] * role_count + role[order], np.arange(groups * role_count + 1))
+    members = {
+        (g, r): order[bounds[g * role_count + r]:bounds[g * role_count + r + 1]][:POOL_PER_GROUP]
+        for g in range(groups) for r in range(role_count)
+    }
+    by_popularity = np.argsort(-popularity, kind="stable")
+    popular = {r: by_popularity[role[by_popularity] == r][:POOL_PER_GROUP] for r in range(role_count)}
+    return members, popular
+
+def candidate_pools(similarity, members, popular):
+    """Per role code: the most followed eligible users of the SIMILAR_GROUPS most similar groups.
+
+    Every pool also holds the most followed eligible users overall, so users
+    with no sports and no follows still get suggestions.
+    """
+    # Selection instead of a full sort; ties at the cut go to the lower group index
+    if len(similarity) > SIMILAR_GROUPS:
+        cut = -np.partition(-similarity, SIMILAR_GROUPS - 1)[SIMILAR_GROUPS - 1]
+        above = np.flatnonzero(similarity > cut)
+        similar = np.concatenate([above, np.flatnonzero(similarity == cut)[:SIMILAR_GROUPS - len(above)]])
+    else:
+        similar = np.arange(len(similarity))
+    similar = similar[np.argsort(-similarity[similar], kind="stable")]
+    similar = similar[similarity[similar] > 0]
+    pools = {}
+    for r, allowed in SUGGESTED_ROLES.items():
+        parts = [members[h, a] for h in similar for a in allowed] + [popular[a] for a in allowed]
+        pools[r] = np.concatenate(parts)
+    return pools
+
+def suggest(u, users, group, role, popularity, similarity, pool, indptr, followees, vocabulary_sets, top_k):
+    followed = followees[indptr[u]:indptr[u + 1]]
+    expanded = followed[:MAX_FOLLOWEES_EXPANDED]
+    second_hop = np.concatenate([followees[indptr[f]:indptr[f + 1]] for f in expanded]) if len(expanded) else np.empty(0, dtype=np.int64)
+    graph_candidates, mutual = np.unique(second_hop, return_counts=True)
+
+    candidates = np.union1d(pool, graph_candidates)
+    allowed = np.isin(role[candidates], SUGGESTED_ROLES[role[u]])
+    allowed &= candidates != u
+    allowed &= ~np.isin(candidates, followed)
+    candidates = candidates[allowed]
+    if not len(candidates):
+        return []
+
+    mutual_counts = np.zeros(len(candidates), dtype=np.int64)
+    position = np.searchsorted(graph_candidates, candidates)
+    found = position < len(graph_candidates)
+    found[found] = graph_candidates[position[found]] == candidates[found]
+    mutual_counts[found] = mutual[position[found]]
+
+    scores = (
+        SPORT_WEIGHT * similarity[group[candidates]]
+        + GRAPH_WEIGHT * np.minimum(mutual_counts / MUTUAL_FOLLOWS_SATURATION, 1.0)
+        + POPULARITY_WEIGHT * popularity[candidates]
+    )
+    if len(candidates) > top_k:
+        best = np.argpartition(-scores, top_k)[:top_k]
+    else:
+        best = np.arange(len(candidates))
+    best = best[np.argsort(-scores[best], kind="stable")]
+
+    suggestions = []
+    for i in best:
+        candidate = users[candidates[i]]
+        suggestions.append({
+            "user_id": candidate["id"],
+            "username": candidate["username"],
+            "full_name": candidate.get("full_name", ""),
+            "role": candidate["role"],
+            "profile_image": candidate.get("profile_image") or "",
+            "score": round(float(scores[i]), 4),
+            "mutual_follows": int(mutual_counts[i]),
+            "shared_sports": sorted(vocabulary_sets[u] & vocabulary_sets[candidates[i]]),
+        })
+    return suggestions
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="compute but do not write suggestions")
+    args = parser.parse_args()
+
+    print(f"🤝 Computing follow suggestions{' (dry run)' if args.dry_run else ''}")
+    print("=" * 50)
+    server.connect_to_mongo()
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+
+    users = await load_users()
+    users = [user for user in users if user.get("role") in ROLES]
+    index_of = {user["id"]: i for i, user in enumerate(users)}
+    indptr, followees = await load_follow_graph(index_of)
+    print(f"📥 Loaded {len(users)} users and {len(followees)} follows in {time.perf_counter() - start:.1f} s")
+
+    role = np.array([ROLES.index(user["role"]) for user in users], dtype=np.int64)
+    followers = np.array([user["followers_count"] for user in users], dtype=np.float64)
+    popularity = np.log1p(followers) / max(np.log1p(followers.max(initial=0)), 1.0)
+    group, keys, postings, vocabulary = sport_groups(users)
+    group_sizes = np.array([len(key) for key in keys], dtype=np.float64)
+    members, popular = group_members(group, role, popularity, len(keys))
+    vocabulary_sets = [set(user["sport_terms"]) for user in users]
+    print(f"🏅 {len(vocabulary)} sports in {len(keys)} distinct combinations")
+
+    async def flush(batch):
+        if not args.dry_run:
+            await server.suggestions_collection.bulk_write(batch, ordered=False)
+        print(f"   suggestions: {written + len(batch)} users written so far")
+        return len(batch)
+
+    written = 0
+    batch = []
+    # Users in group order, so each group's similarity row is computed once and dropped
+    order = np.argsort(group, kind="stable")
+    bounds = np.searchsorted(group[order], np.arange(len(keys) + 1))
+    for g, key in enumerate(keys):
+        similarity = group_similarity(key, group_sizes, postings)
+        pools = candidate_pools(similarity, members, popular)
+        for u in order[bounds[g]:bounds[g + 1]]:
+            suggestions = suggest(u, users, group, role, popularity, similarity, pools[role[u]], indptr, followees, vocabulary_sets, args.top_k)
+            batch.append(ReplaceOne(
+                {"user_id": users[u]["id"]},
+                {"user_id": users[u]["id"], "suggestions": suggestions, "computed_at": server.to_mongo_datetime(started_at)},
+                upsert=True,
+            ))
+            if len(batch) >= args.batch_size:
+                written += await flush(batch)
+                batch = []
+    if batch:
+        written += await flush(batch)
+
+    removed = 0
+    if not args.dry_run:
+        result = await server.suggestions_collection.delete_many({"computed_at": {"$lt": server.to_mongo_datetime(started_at)}})
+        removed = result.deleted_count
+
+    print(f"✅ Suggestions for {written} users in {time.perf_counter() - start:.1f} s, {removed} stale removed")
+    server.close_mongo_connection()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
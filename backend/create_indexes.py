@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Build the MongoDB indexes declared in server.INDEX_SPECS ahead of a deploy.
+
+The API also ensures these on startup, but building them here first keeps a
+large index build off the first request path of a fresh instance.
+
+Usage:
+    python create_indexes.py
+"""
+
+import asyncio
+import sys
+
+import server
+
+async def main():
+    print("🔧 Ensuring MongoDB indexes")
+    print("=" * 50)
+
+    server.connect_to_mongo()
+    report = await server.ensure_indexes(server.db)
+    for entry in report:
+        keys = ", ".join(f"{field} {direction}" for field, direction in entry["keys"])
+        icon = {"created": "✅", "exists": "➖", "failed": "❌"}[entry["status"]]
+        print(f"{icon} {entry['collection']}.{entry['index']} ({keys}): {entry['status']}")
+        if entry["status"] == "failed":
+            print(f"   {entry['error']}")
+
+    failed = [entry for entry in report if entry["status"] == "failed"]
+    created = [entry for entry in report if entry["status"] == "created"]
+    print("=" * 50)
+    print(f"📊 {len(created)} created, {len(report) - len(created) - len(failed)} existing, {len(failed)} failed")
+
+    server.close_mongo_connection()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -4,6 +4,7 @@ Khel Bhoomi Backend Server
 Entry point for running the FastAPI application
 """
 
+import importlib.util
 import os
 import uvicorn
 from pathlib import Path
@@ -13,23 +14,86 @@ from dotenv import load_dotenv
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+def production_workers():
+    """Worker count: WEB_CONCURRENCY if set, else one event loop per CPU capped at MAX_WORKERS.
+
+    Workers reach each other's WebSockets, live streams and caches only over
+    a shared pub/sub, so with PUBSUB_BACKEND=memory a single worker is used.
+    """
+    configured = os.environ.get('WEB_CONCURRENCY')
+    if configured:
+        workers = max(1, int(configured))
+    else:
+        max_workers = int(os.environ.get('MAX_WORKERS', 8))
+        workers = max(1, min(os.cpu_count() or 1, max_workers))
+    if workers > 1 and os.environ.get('PUBSUB_BACKEND', 'memory') == 'memory':
+        print(f"⚠️  PUBSUB_BACKEND=memory cannot deliver between workers; running 1 worker instead of {workers}. "
+              "Set PUBSUB_BACKEND=redis to run more.", flush=True)
+        return 1
+    return workers
+
+def run_gunicorn(host, port, workers):
+    """Serve with gunicorn managing uvicorn workers.
+
+    The app is imported once in the master and forked (preload_app), so
+    workers share its memory pages; each worker opens its own MongoDB
+    client in the app's lifespan handler. `kill -HUP <master pid>` replaces the
+    workers one generation at a time, letting in-flight requests finish
+    within GRACEFUL_TIMEOUT; set PRELOAD_APP=false if a HUP should also
+    pick up new code.
+    """
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.util import import_app
+
+    class KhelBhoomiApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return import_app("server:app")
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": os.environ.get('PRELOAD_APP', 'true').lower() == 'true',
+        "graceful_timeout": int(os.environ.get('GRACEFUL_TIMEOUT', 30)),
+        "timeout": int(os.environ.get('WORKER_TIMEOUT', 60)),
+        "keepalive": int(os.environ.get('KEEPALIVE', 5)),
+        "max_requests": int(os.environ.get('MAX_REQUESTS', 0)),
+        "max_requests_jitter": int(os.environ.get('MAX_REQUESTS_JITTER', 0)),
+        "accesslog": "-",
+        "loglevel": "info",
+    }
+    KhelBhoomiApplication(options).run()
+
 if __name__ == "__main__":
     # Get configuration from environment variables
     host = os.environ.get('HOST', '0.0.0.0')
     port = int(os.environ.get('PORT', 8001))
     environment = os.environ.get('ENVIRONMENT', 'development')
-    
+
     # Configure uvicorn based on environment
     if environment == 'production':
         # Production configuration
-        uvicorn.run(
-            "server:app",
-            host=host,
-            port=port,
-            workers=1,  # Render.com typically works better with 1 worker
-            log_level="info",
-            access_log=True
-        )
+        workers = production_workers()
+        if importlib.util.find_spec("gunicorn") is not None:
+            run_gunicorn(host, port, workers)
+        else:
+            # gunicorn is POSIX-only; fall back to uvicorn's own process manager
+            uvicorn.run(
+                "server:app",
+                host=host,
+                port=port,
+                workers=workers,
+                log_level="info",
+                access_log=True
+            )
     else:
         # Development configuration
         uvicorn.run(
@@ -39,4 +103,4 @@ if __name__ == "__main__":
             reload=True,
             log_level="debug",
             access_log=True
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Convert ISO-string timestamps to native BSON dates.
+
+Run this after deploying with DATETIME_STORAGE=native. Documents are
+converted in _id order, in batches, and only while the field is still a
+string, so the script can be stopped and re-run at any point: converted
+documents are never touched twice.
+
+Usage:
+    python migrate_datetimes.py [--batch-size 1000] [--dry-run] [collection ...]
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+import server
+
+# collection -> timestamp fields written by the API
+DATETIME_FIELDS = {
+    "users": ["created_at", "last_active_at"],
+    "posts": ["created_at"],
+    "profile": ["created_at"],
+    "login": ["login_time"],
+    "signup": ["signup_time"],
+    "timelines": ["created_at"],
+    "follows": ["created_at"],
+    "likes": ["created_at"],
+    "comments": ["created_at"],
+    "messages": ["created_at"],
+    "inbox": ["last_message_at"],
+    "suggestions": ["computed_at"],
+}
+
+def parse_timestamp(value):
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+async def migrate_field(collection_name, field, batch_size, dry_run):
+    collection = server.db[collection_name]
+    converted = 0
+    unparseable = 0
+    last_id = None
+
+    while True:
+        query = {field: {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await collection.find(query, {field: 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        updates = []
+        for doc in batch:
+            try:
+                value = parse_timestamp(doc[field])
+            except ValueError:
+                unparseable += 1
+                continue
+            # Matching on the old value leaves documents rewritten since the read alone
+            updates.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: value}}))
+
+        if updates and not dry_run:
+            result = await collection.bulk_write(updates, ordered=False)
+            converted += result.modified_count
+        else:
+            converted += len(updates)
+        print(f"   {collection_name}.{field}: {converted} converted so far")
+
+    return converted, unparseable
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("collections", nargs="*", default=list(DATETIME_FIELDS), help="collections to migrate (default: all)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="count documents that would be converted")
+    args = parser.parse_args()
+
+    unknown = set(args.collections) - set(DATETIME_FIELDS)
+    if unknown:
+        print(f"❌ Unknown collections: {', '.join(sorted(unknown))}")
+        return 1
+
+    print(f"🕒 Migrating timestamps to native dates{' (dry run)' if args.dry_run else ''}")
+    print("=" * 50)
+
+    server.connect_to_mongo()
+
+    total_unparseable = 0
+    for collection_name in args.collections:
+        for field in DATETIME_FIELDS[collection_name]:
+            converted, unparseable = await migrate_field(collection_name, field, args.batch_size, args.dry_run)
+            total_unparseable += unparseable
+            print(f"✅ {collection_name}.{field}: {converted} converted, {unparseable} unparseable")
+
+    server.close_mongo_connection()
+    return 1 if total_unparseable else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
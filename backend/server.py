@@ -1,38 +1,193 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, BackgroundTasks, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 import os
 import logging
+import math
+import random
+import re
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
+import time
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional
+from urllib.parse import urlencode
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 from passlib.context import CryptContext
 import bcrypt
 
+try:
+    import orjson
+except ImportError:  # optional: the feed falls back to the stdlib encoder
+    orjson = None
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
-# Collections - Using your specific collection structure
-users_collection = db['users']
-login_collection = db['login']
-signup_collection = db['signup']
-posts_collection = db['posts']
-profile_collection = db['profile']
-comments_collection = db['comments']
-likes_collection = db['likes']
-follows_collection = db['follows']
-messages_collection = db['messages']
-data_collection = db['Data']  # Keep existing collection for backward compatibility
+
+# Set by connect_to_mongo(), which the lifespan handler runs in each worker process
+client = None
+db = None
+_transactions_supported = None  # detected on first signup, per client
+
+def mongo_client_options():
+    """Connection pool settings from the environment; unset ones keep the driver defaults"""
+    env_options = {
+        'MONGO_MAX_POOL_SIZE': ('maxPoolSize', int),
+        'MONGO_MIN_POOL_SIZE': ('minPoolSize', int),
+        'MONGO_MAX_IDLE_TIME_MS': ('maxIdleTimeMS', int),
+        'MONGO_MAX_CONNECTING': ('maxConnecting', int),
+        'MONGO_WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', int),
+        'MONGO_SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', int),
+        'MONGO_CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int),
+        'MONGO_COMPRESSORS': ('compressors', str),  # e.g. "zstd,snappy,zlib"
+    }
+    options = {}
+    for env_name, (option, cast) in env_options.items():
+        value = os.environ.get(env_name)
+        if value:
+            options[option] = cast(value)
+    return options
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so /api/metrics can show pool utilisation.
+
+    The driver calls these from its own threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.peak_checked_out = 0
+        self.peak_waiting = 0
+        self.created = 0
+        self.checkouts = 0
+        self.checkout_failures = {}
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_waiting": self.peak_waiting,
+                "connections_created": self.created,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "pool_clears": self.pool_clears,
+            }
+
+pool_stats = PoolStatsListener()
+
+def connect_to_mongo():
+    """Create this process's Motor client and collection handles.
+
+    Called from the lifespan handler so every worker builds its own client
+    after any fork; standalone scripts call it directly.
+    """
+    global client, db, _transactions_supported
+    global users_collection, login_collection, signup_collection, posts_collection, profile_collection
+    global comments_collection, likes_collection, follows_collection, messages_collection, data_collection
+    global timelines_collection, inbox_collection, suggestions_collection
+
+    # tz_aware so native BSON dates come back as UTC-aware datetimes
+    client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[pool_stats], **mongo_client_options())
+    _transactions_supported = None
+    db = client[os.environ['DB_NAME']]
+
+    # Collections - Using your specific collection structure
+    users_collection = db['users']
+    login_collection = db['login']
+    signup_collection = db['signup']
+    posts_collection = db['posts']
+    profile_collection = db['profile']
+    comments_collection = db['comments']
+    likes_collection = db['likes']
+    follows_collection = db['follows']
+    messages_collection = db['messages']
+    timelines_collection = db['timelines']  # precomputed home timeline entries, one per (user, post)
+    inbox_collection = db['inbox']  # one row per (user, conversation), updated on every message
+    suggestions_collection = db['suggestions']  # written by compute_follow_suggestions.py, one per user
+    data_collection = db['Data']  # Keep existing collection for backward compatibility
+
+def close_mongo_connection():
+    global client
+    if client is not None:
+        client.close()
+        client = None
+
+# How datetimes are stored: "iso" strings (legacy) or "native" BSON dates.
+# Switch to native, then run migrate_datetimes.py to convert existing documents.
+DATETIME_STORAGE = os.environ.get('DATETIME_STORAGE', 'iso')
 
 # JWT and Password setup
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-here')
@@ -42,13 +197,31 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_to_mongo()
+    await create_db_indexes()
+    audit_writer.start()
+    message_writer.start()
+    await pubsub.start()
+    trending_counter = asyncio.create_task(run_trending_tags())
+    yield
+    trending_counter.cancel()
+    await pubsub.stop()
+    await response_cache.close()
+    await message_writer.stop()
+    await audit_writer.stop()
+    close_mongo_connection()
+    password_hasher.shutdown()
+
 # Create the main app
 app = FastAPI(
     title="Khel Bhoomi API", 
     description="Sports Social Platform API",
     version="1.0.0",
     docs_url="/docs" if os.environ.get('ENVIRONMENT') != 'production' else None,
-    redoc_url="/redoc" if os.environ.get('ENVIRONMENT') != 'production' else None
+    redoc_url="/redoc" if os.environ.get('ENVIRONMENT') != 'production' else None,
+    lifespan=lifespan
 )
 
 # Create a router with the /api prefix
@@ -107,6 +280,27 @@ class SignupRecord(BaseModel):
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
 
+class UserSuggestion(BaseModel):
+    id: str
+    username: str
+    full_name: str
+    role: str
+    profile_image: Optional[str] = ""
+
+class TrendingTag(BaseModel):
+    tag: str
+    count: int
+
+class AthleteCard(BaseModel):
+    id: str
+    username: str
+    full_name: str
+    profile_image: Optional[str] = ""
+    sports_interests: List[str] = []
+    achievements: List[str] = []
+    last_active_at: Optional[datetime] = None
+    activity: float = 0.0  # decayed activity count as of the request
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -120,6 +314,13 @@ class PostCreate(BaseModel):
     video_url: Optional[str] = None
     sports_tags: List[str] = []
 
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lstrip("#").lower()
+
+def normalize_tags(tags: List[str]) -> List[str]:
+    """Normalised, de-duplicated tags in their original order"""
+    return [tag for tag in dict.fromkeys(normalize_tag(tag) for tag in tags) if tag]
+
 class Post(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
@@ -134,6 +335,80 @@ class Post(BaseModel):
     comments: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# Follow Models
+class FollowEdge(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    follower_id: str
+    follower_username: str
+    followee_id: str
+    followee_username: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class FollowSuggestion(BaseModel):
+    user_id: str
+    username: str
+    full_name: str
+    role: str
+    profile_image: Optional[str] = ""
+    score: float
+    mutual_follows: int = 0  # accounts the user follows that follow this one
+    shared_sports: List[str] = []
+
+class FollowStatus(BaseModel):
+    username: str
+    following: bool
+
+# Comment Models
+class CommentCreate(BaseModel):
+    content: str
+
+class Comment(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    post_id: str
+    user_id: str
+    username: str
+    content: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+# Like Models
+class Like(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    post_id: str
+    user_id: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class LikeStatus(BaseModel):
+    post_id: str
+    liked: bool
+    likes: int
+
+class LikedPosts(BaseModel):
+    liked: List[str]
+
+# Message Models
+class Message(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    conversation_id: str
+    sender_id: str
+    sender_username: str
+    recipient_id: str
+    recipient_username: str
+    content: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class MessageCreate(BaseModel):
+    to: str
+    content: str
+
+class InboxEntry(BaseModel):
+    conversation_id: str
+    peer_id: str
+    peer_username: str
+    last_message_preview: str
+    last_sender_id: str
+    last_message_at: datetime
+    unread_count: int = 0
+
 # Helper functions
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -141,6 +416,93 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Runs bcrypt work on a bounded executor so it never blocks the event loop.
+
+    At most max_concurrency hashes run at once; further callers wait their
+    turn, and once max_queue callers are already waiting new ones get a 503
+    instead of piling up (max_queue=0 means wait indefinitely).
+    """
+
+    def __init__(self, executor_kind: str, max_workers: int, max_concurrency: int, max_queue: int = 0):
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.running = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = None
+        # Created on first use so it binds to the server's event loop, not the import-time one
+        self._semaphore = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.executor_kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._semaphore.locked():
+            if self.max_queue and self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Server busy, please retry")
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+_hash_workers = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+password_hasher = PasswordHasher(
+    executor_kind=os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread'),
+    max_workers=_hash_workers,
+    max_concurrency=int(os.environ.get('PASSWORD_HASH_MAX_CONCURRENCY', _hash_workers)),
+    max_queue=int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 0)),
+)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -151,37 +513,160 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+class TTLCache:
+    """In-process LRU cache whose entries also expire after ttl seconds.
+
+    Each worker process has its own copy, so anything cached here can be up to
+    ttl seconds stale in other workers after an invalidation.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key in this process into one.
+
+    The first caller runs the coroutine; callers arriving while it is in
+    flight await the same result (or exception) instead of repeating it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # shield: one caller disconnecting must not cancel the call for the others
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {"in_flight": len(self._calls), "calls": self.calls, "coalesced": self.coalesced}
+
+# Authenticated users by username, so get_current_user skips the users lookup on the hot path
+user_cache = TTLCache(
+    max_size=int(os.environ.get('USER_CACHE_MAX_SIZE', 10000)),
+    ttl=float(os.environ.get('USER_CACHE_TTL_SECONDS', 60)),
+)
+
+# Identical concurrent reads (a viral profile, a burst of requests from one
+# user) share one in-flight query instead of each going to MongoDB
+lookup_flights = SingleFlight()
+
+async def find_user_by_username(username: str) -> Optional[dict]:
+    """The users document for username, or None.
+
+    Each caller gets its own shallow copy, so popping fields (the password)
+    does not affect the others sharing the query.
+    """
+    user_data = await lookup_flights.do(("users.username", username), lambda: users_collection.find_one({"username": username}))
+    return dict(user_data) if user_data is not None else None
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await get_user_from_token(credentials.credentials)
+
+async def get_user_from_token(token: str) -> User:
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    user_data = await users_collection.find_one({"username": username})
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    
+    user_data = await find_user_by_username(username)
     if user_data is None:
         raise HTTPException(status_code=401, detail="User not found")
     
     # Remove password from user data
     user_data.pop('password', None)
-    return User(**user_data)
+    user = User(**user_data)
+    user_cache.set(username, user)
+    return user
+
+def to_mongo_datetime(value: datetime):
+    """Convert a datetime to the representation selected by DATETIME_STORAGE"""
+    if DATETIME_STORAGE == 'native':
+        return value
+    return value.isoformat()
 
 def prepare_for_mongo(data):
-    """Convert datetime objects to ISO format for MongoDB storage"""
+    """Convert datetime objects to the configured storage format for MongoDB"""
     if isinstance(data, dict):
         prepared_data = {}
         for key, value in data.items():
             if isinstance(value, datetime):
-                prepared_data[key] = value.isoformat()
+                prepared_data[key] = to_mongo_datetime(value)
             else:
                 prepared_data[key] = value
         return prepared_data
     return data
 
+def as_datetime(value) -> datetime:
+    """A stored timestamp as an aware datetime, whichever format it was written in"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
 def parse_from_mongo(item):
     """Parse datetime fields from MongoDB"""
+    # Native BSON dates are already datetimes; nothing to parse
+    if DATETIME_STORAGE == 'native':
+        return item
     if isinstance(item, dict):
         for key, value in item.items():
             if isinstance(value, str) and key.endswith('_at'):
@@ -191,16 +676,917 @@ def parse_from_mongo(item):
                     pass
     return item
 
+# User search terms
+# Users carry a lowercase, accent-free `search_terms` array (username, full
+# name, and each word or part of them) so typeahead is a range scan on one
+# multikey index: prefix <= term < prefix with its last character bumped.
+def normalize_search_text(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+def user_search_terms(username: str, full_name: str) -> List[str]:
+    terms = []
+    for value in (username, full_name):
+        normalized = normalize_search_text(value)
+        terms.append(normalized)
+        terms.extend(part for part in re.split(r"[^\w]+|_", normalized) if part)
+    return [term for term in dict.fromkeys(terms) if term]
+
+def prefix_range(prefix: str) -> dict:
+    return {"$gte": prefix, "$lt": prefix[:-1] + chr(ord(prefix[-1]) + 1)}
+
+# Athlete discovery fields
+# sport_terms and achievement_terms are normalised copies of sports_interests
+# and of the words in achievements. activity_score sums
+# weight * 2^((t - ACTIVITY_EPOCH) / half-life) over a user's activity:
+# dividing by the same factor for now gives the decayed count, and because
+# every score shares that factor they rank correctly and can be $inc'ed
+# without ever being rescaled. At a 7 day half-life the factor stays within
+# float range until about 2043; move the epoch and rerun the backfill first.
+ACTIVITY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+ACTIVITY_HALF_LIFE_DAYS = float(os.environ.get('ACTIVITY_HALF_LIFE_DAYS', 7))
+ACTIVITY_WEIGHTS = {"post": 1.0, "comment": 0.25}
+
+def sport_terms(sports: List[str]) -> List[str]:
+    return [term for term in dict.fromkeys(normalize_search_text(sport) for sport in sports or []) if term]
+
+def achievement_terms(achievements: List[str]) -> List[str]:
+    words = (word for achievement in achievements or [] for word in re.split(r"[^\w]+", normalize_search_text(achievement)))
+    return [word for word in dict.fromkeys(words) if len(word) > 1]
+
+def activity_growth(at: datetime) -> float:
+    return 2 ** ((at - ACTIVITY_EPOCH).total_seconds() / (ACTIVITY_HALF_LIFE_DAYS * 86400))
+
+# Database indexes
+# (collection, keys, options) - every index the API relies on, named so the
+# bootstrap report can tell which ones already existed.
+INDEX_SPECS = [
+    ('users', [("username", 1)], {"name": "username_unique", "unique": True}),
+    ('users', [("email", 1)], {"name": "email_unique", "unique": True}),
+    ('users', [("search_terms", 1)], {"name": "search_terms"}),
+    # Athlete discovery: equality on role (and one multikey filter), then the ranking sort.
+    # sport_terms and achievement_terms are both arrays, so they cannot share an index.
+    ('users', [("role", 1), ("activity_score", -1), ("id", -1)], {"name": "role_activity_score_id"}),
+    ('users', [("role", 1), ("sport_terms", 1), ("activity_score", -1), ("id", -1)], {"name": "role_sport_terms_activity_score_id"}),
+    ('users', [("role", 1), ("achievement_terms", 1), ("activity_score", -1), ("id", -1)], {"name": "role_achievement_terms_activity_score_id"}),
+    ('users', [("id", 1)], {"name": "id_unique", "unique": True}),
+    ('posts', [("id", 1)], {"name": "id_unique", "unique": True}),
+    ('posts', [("user_id", 1), ("created_at", -1), ("id", -1)], {"name": "user_id_created_at_id"}),
+    ('posts', [("created_at", -1), ("id", -1)], {"name": "created_at_id"}),
+    ('posts', [("sports_tags", 1), ("created_at", -1), ("id", -1)], {"name": "sports_tags_created_at_id"}),
+    ('posts', [("content", "text"), ("sports_tags", "text")], {"name": "content_sports_tags_text", "weights": {"content": 1, "sports_tags": 3}}),
+    ('profile', [("user_id", 1)], {"name": "user_id_unique", "unique": True}),
+    ('profile', [("username", 1)], {"name": "username_unique", "unique": True}),
+    ('profile', [("followers_count", -1)], {"name": "followers_count"}),
+    ('follows', [("follower_id", 1), ("followee_id", 1)], {"name": "follower_id_followee_id_unique", "unique": True}),
+    ('follows', [("followee_id", 1), ("created_at", -1), ("id", -1)], {"name": "followee_id_created_at_id"}),
+    ('follows', [("follower_id", 1), ("created_at", -1), ("id", -1)], {"name": "follower_id_created_at_id"}),
+    ('likes', [("post_id", 1), ("user_id", 1)], {"name": "post_id_user_id_unique", "unique": True}),
+    ('comments', [("post_id", 1), ("created_at", -1), ("id", -1)], {"name": "post_id_created_at_id"}),
+    ('messages', [("conversation_id", 1), ("created_at", -1), ("id", -1)], {"name": "conversation_id_created_at_id"}),
+    ('suggestions', [("user_id", 1)], {"name": "user_id_unique", "unique": True}),
+    ('inbox', [("user_id", 1), ("conversation_id", 1)], {"name": "user_id_conversation_id_unique", "unique": True}),
+    ('inbox', [("user_id", 1), ("last_message_at", -1), ("conversation_id", -1)], {"name": "user_id_last_message_at_conversation_id"}),
+    ('timelines', [("user_id", 1), ("created_at", -1), ("post_id", -1)], {"name": "user_id_created_at_post_id"}),
+    ('timelines', [("user_id", 1), ("post_id", 1)], {"name": "user_id_post_id_unique", "unique": True}),
+    ('login', [("login_time", -1)], {"name": "login_time"}),
+    ('login', [("username", 1), ("login_time", -1)], {"name": "username_login_time"}),
+    ('signup', [("signup_time", -1)], {"name": "signup_time"}),
+    ('signup', [("username", 1)], {"name": "username"}),
+]
+
+async def ensure_indexes(database):
+    """Create any missing indexes from INDEX_SPECS and report what was done.
+
+    Safe to run repeatedly: existing indexes are left alone, and a failure on
+    one index (e.g. duplicates blocking a unique index) does not stop the rest.
+    """
+    report = []
+    existing_by_collection = {}
+    for collection_name, keys, options in INDEX_SPECS:
+        collection = database[collection_name]
+        if collection_name not in existing_by_collection:
+            existing_by_collection[collection_name] = await collection.index_information()
+        existing = existing_by_collection[collection_name]
+
+        entry = {"collection": collection_name, "index": options["name"], "keys": keys}
+        existing_keys = [list(info["key"]) for info in existing.values()]
+        if options["name"] in existing or [tuple(k) for k in keys] in existing_keys:
+            entry["status"] = "exists"
+        else:
+            try:
+                await collection.create_index(keys, **options)
+                entry["status"] = "created"
+            except PyMongoError as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+        report.append(entry)
+    return report
+
+# Keyset pagination
+# Cursors are opaque to clients: base64 of the (created_at, id) of the last
+# item served, so the next page is an index seek instead of a skip.
+MAX_PAGE_SIZE = 100
+
+# Only the fields a Post is built from; drops Mongo's _id and anything else stored alongside
+POST_PROJECTION = {"_id": 0, **{field: 1 for field in Post.model_fields}}
+
+# Values Post fills in for fields older documents may not have
+POST_DEFAULTS = {"image_url": None, "video_url": None, "sports_tags": [], "likes": 0, "comments": 0}
+
+def clamp_page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def encode_cursor(created_at, item_id):
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps({"c": created_at, "i": item_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return str(data["c"]), str(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(cursor: str, time_field: str = "created_at", id_field: str = "id"):
+    """Match items strictly after the cursor in (time_field, id_field) descending order"""
+    created_at, item_id = decode_cursor(cursor)
+    if DATETIME_STORAGE == 'native':
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {time_field: {"$lt": created_at}},
+        {time_field: created_at, id_field: {"$lt": item_id}},
+    ]}
+
+async def fetch_post_page(query: dict, limit: int, cursor: Optional[str] = None, skip: int = 0, projection: Optional[dict] = None):
+    """Fetch one newest-first page of posts and the cursor for the page after it"""
+    limit = clamp_page_size(limit)
+    if cursor:
+        query = {**query, **keyset_filter(cursor)}
+    find = posts_collection.find(query, projection).sort([("created_at", -1), ("id", -1)])
+    if skip and not cursor:
+        find = find.skip(skip)
+    # One extra document tells us whether another page exists
+    posts_data = await find.limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = None
+    if len(posts_data) > limit:
+        posts_data = posts_data[:limit]
+        next_cursor = encode_cursor(posts_data[-1]["created_at"], posts_data[-1]["id"])
+    return posts_data, next_cursor
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def serialize_posts(posts_data) -> bytes:
+    """Encode projected post documents straight to JSON in the Post schema.
+
+    Feed pages skip building a Post per item and FastAPI's response_model
+    validation; the projection already limits documents to Post's fields.
+    """
+    items = [{**POST_DEFAULTS, **post_data} for post_data in posts_data]
+    if orjson is not None:
+        return orjson.dumps(items)
+    return json.dumps(items, default=_json_default, separators=(",", ":")).encode()
+
+def post_page_response(posts_data, next_cursor: Optional[str]) -> Response:
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=serialize_posts(posts_data), media_type="application/json", headers=headers)
+
+# Background writes
+class BatchedWriter:
+    """Buffers documents in memory and writes them with insert_many off the request path.
+
+    A batch is flushed once it reaches max_batch documents or flush_interval
+    seconds after its first document. The queue holds at most max_queue
+    documents; when it is full, overflow="drop" discards the new document
+    and overflow="block" makes the caller wait for room. stop() drains and
+    flushes everything still queued. Until start() has run, submit() writes
+    the document directly.
+
+    Documents whose insert fails are retried up to max_retries times with
+    exponential backoff; while that happens the queue fills up behind them.
+    A duplicate key on retry means an earlier attempt did write the document.
+    """
+
+    MAX_RETRY_BACKOFF = 5.0
+
+    def __init__(self, name: str, max_batch: int, flush_interval: float, max_queue: int, overflow: str = 'drop',
+                 max_retries: int = 0, retry_backoff: float = 0.1):
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.retried = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self._queue = None
+        self._task = None
+        self._stopping = False
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping = True
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def submit(self, collection_name: str, document: dict):
+        if self._task is None:
+            await db[collection_name].insert_one(document)
+            return
+        if self.overflow == 'block':
+            await self._queue.put((collection_name, document))
+        else:
+            try:
+                self._queue.put_nowait((collection_name, document))
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return
+        self.enqueued += 1
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        try:
+            # Bounded wait so the loop notices stop() even when idle
+            batch = [await asyncio.wait_for(self._queue.get(), self.flush_interval)]
+        except asyncio.TimeoutError:
+            return []
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.max_batch:
+            if self._stopping and self._queue.empty():
+                break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch):
+        by_collection = {}
+        for collection_name, document in batch:
+            by_collection.setdefault(collection_name, []).append(document)
+        started = time.perf_counter()
+        for collection_name, documents in by_collection.items():
+            pending = await self._write(collection_name, documents)
+            for attempt in range(self.max_retries):
+                if not pending:
+                    break
+                await asyncio.sleep(min(self.retry_backoff * 2 ** attempt, self.MAX_RETRY_BACKOFF))
+                self.retried += len(pending)
+                pending = await self._write(collection_name, pending)
+            if pending and self.max_retries:
+                logger.error(f"{self.name}: gave up on {len(pending)} documents for {collection_name} after {self.max_retries} retries")
+            self.failed += len(pending)
+        self.flushes += 1
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _write(self, collection_name: str, documents: list) -> list:
+        """Insert documents unordered and return the ones that were not written"""
+        try:
+            await db[collection_name].insert_many(documents, ordered=False)
+            self.written += len(documents)
+            return []
+        except BulkWriteError as e:
+            # Unordered, so everything but the failing documents was written
+            failed = {error["index"] for error in e.details.get("writeErrors", []) if error.get("code") != 11000}
+            logger.error(f"{self.name}: {len(failed)} writes to {collection_name} failed: {e}")
+        except PyMongoError as e:
+            failed = set(range(len(documents)))
+            logger.error(f"{self.name}: writing {len(documents)} documents to {collection_name} failed: {e}")
+        self.written += len(documents) - len(failed)
+        return [document for index, document in enumerate(documents) if index in failed]
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "overflow": self.overflow,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "retried": self.retried,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+# Login and signup records are audit data: nothing reads them back on the request path
+audit_writer = BatchedWriter(
+    name="audit_writer",
+    max_batch=int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 100)),
+    flush_interval=float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 1.0)),
+    max_queue=int(os.environ.get('AUDIT_LOG_MAX_QUEUE', 10000)),
+    overflow=os.environ.get('AUDIT_LOG_OVERFLOW', 'drop'),
+)
+
+# Messages are persisted in batches too, but never dropped: a full queue makes
+# senders wait, and failed inserts are retried (about a minute by default)
+message_writer = BatchedWriter(
+    name="message_writer",
+    max_batch=int(os.environ.get('MESSAGE_WRITE_BATCH_SIZE', 200)),
+    flush_interval=float(os.environ.get('MESSAGE_WRITE_FLUSH_INTERVAL', 0.25)),
+    max_queue=int(os.environ.get('MESSAGE_WRITE_MAX_QUEUE', 10000)),
+    overflow='block',
+    max_retries=int(os.environ.get('MESSAGE_WRITE_MAX_RETRIES', 15)),
+)
+
+# Real-time delivery
+class InMemoryPubSub:
+    """Publishes events to handlers in this process only (single worker deployments)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._handlers = {}
+        self.published = 0
+
+    def subscribe(self, channel: str, handler):
+        """Register an async handler(message) for a channel; call before start()"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: dict):
+        self.published += 1
+        await self._dispatch(channel, message)
+
+    async def _dispatch(self, channel: str, message: dict):
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Pub/sub handler for {channel} failed: {e}")
+
+    def stats(self):
+        return {"backend": self.name, "channels": sorted(self._handlers), "published": self.published}
+
+class RedisPubSub(InMemoryPubSub):
+    """Relays events through Redis pub/sub so every worker process receives them.
+
+    Needs the optional `redis` package and a reachable REDIS_URL.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._redis = None
+        self._pubsub = None
+        self._task = None
+
+    async def start(self):
+        import redis.asyncio as redis_asyncio
+
+        self._redis = redis_asyncio.from_url(self.url)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(*self._handlers)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+        if self._redis is not None:
+            await self._redis.close()
+
+    async def publish(self, channel: str, message: dict):
+        self.published += 1
+        await self._redis.publish(channel, json.dumps(message, default=_json_default))
+
+    async def _listen(self):
+        async for item in self._pubsub.listen():
+            if item["type"] != "message":
+                continue
+            channel = item["channel"].decode() if isinstance(item["channel"], bytes) else item["channel"]
+            await self._dispatch(channel, json.loads(item["data"]))
+
+def create_pubsub():
+    if os.environ.get('PUBSUB_BACKEND', 'memory') == 'redis':
+        return RedisPubSub(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+    return InMemoryPubSub()
+
+pubsub = create_pubsub()
+
+class ConnectionHub:
+    """WebSocket connections open in this process, by user id"""
+
+    def __init__(self):
+        self._connections = {}
+        self.delivered = 0
+
+    def register(self, user_id: str, websocket: WebSocket):
+        self._connections.setdefault(user_id, set()).add(websocket)
+
+    def unregister(self, user_id: str, websocket: WebSocket):
+        sockets = self._connections.get(user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._connections[user_id]
+
+    async def send(self, user_id: str, payload: dict):
+        for websocket in list(self._connections.get(user_id, ())):
+            try:
+                await websocket.send_json(payload)
+                self.delivered += 1
+            except Exception:
+                # The receive loop for that socket will notice and unregister it
+                self.unregister(user_id, websocket)
+
+    def stats(self):
+        return {
+            "users": len(self._connections),
+            "connections": sum(len(sockets) for sockets in self._connections.values()),
+            "delivered": self.delivered,
+        }
+
+message_hub = ConnectionHub()
+
+async def deliver_direct_message(event: dict):
+    # Every worker receives every event and delivers to the sockets it holds;
+    # the sender gets a copy too so their other devices stay in sync
+    message = event["message"]
+    await message_hub.send(message["recipient_id"], event)
+    if message["sender_id"] != message["recipient_id"]:
+        await message_hub.send(message["sender_id"], event)
+
+pubsub.subscribe("direct_messages", deliver_direct_message)
+
+class FeedBroadcaster:
+    """Server-Sent Events subscribers in this process.
+
+    Each event is encoded once and offered to every subscriber's bounded
+    queue. A client whose queue is full has fallen behind; it is closed
+    instead of buffered, and EventSource reconnects and refetches.
+    """
+
+    def __init__(self, queue_size: int, heartbeat_interval: float, max_connections: int):
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.max_connections = max_connections
+        self._queues = set()
+        self.events = 0
+        self.evicted = 0
+        self.peak_connections = 0
+
+    def connect(self) -> asyncio.Queue:
+        if len(self._queues) >= self.max_connections:
+            raise HTTPException(status_code=503, detail="Too many live feed connections, try again later")
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.add(queue)
+        self.peak_connections = max(self.peak_connections, len(self._queues))
+        return queue
+
+    def disconnect(self, queue: asyncio.Queue):
+        self._queues.discard(queue)
+
+    @staticmethod
+    def encode(event: dict) -> bytes:
+        if orjson is not None:
+            data = orjson.dumps(event["data"])
+        else:
+            data = json.dumps(event["data"], default=_json_default, separators=(",", ":")).encode()
+        return b"event: " + event["type"].encode() + b"\ndata: " + data + b"\n\n"
+
+    async def broadcast(self, event: dict):
+        self.events += 1
+        if not self._queues:
+            return
+        frame = self.encode(event)
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Replace the backlog with the close marker
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                self._queues.discard(queue)
+                self.evicted += 1
+
+    async def stream(self, queue: asyncio.Queue):
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle connection
+                    frame = b": heartbeat\n\n"
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            self.disconnect(queue)
+
+    def stats(self):
+        return {
+            "connections": len(self._queues),
+            "peak_connections": self.peak_connections,
+            "events": self.events,
+            "evicted": self.evicted,
+        }
+
+feed_broadcaster = FeedBroadcaster(
+    queue_size=int(os.environ.get('SSE_QUEUE_SIZE', 100)),
+    heartbeat_interval=float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15)),
+    max_connections=int(os.environ.get('SSE_MAX_CONNECTIONS', 5000)),
+)
+
+# Published once by the worker that handled the write; every worker relays it to its own subscribers
+pubsub.subscribe("feed_events", feed_broadcaster.broadcast)
+
+async def publish_feed_event(event_type: str, data: dict):
+    try:
+        await pubsub.publish("feed_events", {"type": event_type, "data": data})
+    except Exception as e:
+        # Live updates are best effort; the write itself has already succeeded
+        logger.error(f"Failed to publish {event_type} feed event: {e}")
+
+def conversation_id_for(user_id: str, other_user_id: str) -> str:
+    return ":".join(sorted((user_id, other_user_id)))
+
+MESSAGE_PREVIEW_LENGTH = 200
+
+async def update_inboxes(message: Message):
+    """Upsert the conversation row of both participants in one round trip.
+
+    The inbox is what "my conversations" reads, so listing them never
+    aggregates over raw messages; only the recipient's unread count grows.
+    """
+    last_message = {
+        "last_message_id": message.id,
+        "last_message_preview": message.content[:MESSAGE_PREVIEW_LENGTH],
+        "last_sender_id": message.sender_id,
+        "last_message_at": to_mongo_datetime(message.created_at),
+    }
+    await inbox_collection.bulk_write([
+        UpdateOne(
+            {"user_id": message.sender_id, "conversation_id": message.conversation_id},
+            {"$set": {**last_message, "peer_id": message.recipient_id, "peer_username": message.recipient_username},
+             "$setOnInsert": {"unread_count": 0}},
+            upsert=True
+        ),
+        UpdateOne(
+            {"user_id": message.recipient_id, "conversation_id": message.conversation_id},
+            {"$set": {**last_message, "peer_id": message.sender_id, "peer_username": message.sender_username},
+             "$inc": {"unread_count": 1}},
+            upsert=True
+        ),
+    ], ordered=False)
+
+async def send_direct_message(sender: User, recipient: dict, content: str) -> Message:
+    """Update both inboxes, queue the message for persistence and publish it for live delivery"""
+    message = Message(
+        conversation_id=conversation_id_for(sender.id, recipient["id"]),
+        sender_id=sender.id,
+        sender_username=sender.username,
+        recipient_id=recipient["id"],
+        recipient_username=recipient["username"],
+        content=content
+    )
+    await update_inboxes(message)
+    await message_writer.submit('messages', prepare_for_mongo(message.dict()))
+    await pubsub.publish("direct_messages", {"type": "message", "message": jsonable_encoder(message)})
+    return message
+
+# Response caching
+# Public GET responses (the post list, profiles) are kept as encoded bytes with
+# an ETag for RESPONSE_CACHE_TTL_SECONDS. Writes invalidate either one key or a
+# whole namespace; namespaces are versioned by a generation that is part of
+# every storage key, so dropping one is a counter bump.
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 5))
+
+class LocalResponseStore:
+    """Per-process store; other workers learn about invalidations over pub/sub"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._generations = {}
+
+    async def key(self, namespace: str, key: str) -> str:
+        return f"{namespace}:{self._generations.get(namespace, 0)}:{key}"
+
+    async def get(self, storage_key: str):
+        return self._cache.get(storage_key)
+
+    async def set(self, storage_key: str, entry: dict):
+        self._cache.set(storage_key, entry)
+
+    async def delete(self, namespace: str, key: Optional[str] = None):
+        if key is None:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        else:
+            self._cache.invalidate(await self.key(namespace, key))
+
+    async def close(self):
+        pass
+
+    def stats(self):
+        return self._cache.stats()
+
+class RedisResponseStore:
+    """Store shared by every worker. Needs the optional `redis` package and REDIS_URL.
+
+    Namespace generations live in Redis too; each worker rereads them at most
+    once per GENERATION_REFRESH_SECONDS, which bounds how long another worker
+    can keep serving a dropped namespace.
+    """
+
+    name = "redis"
+    GENERATION_REFRESH_SECONDS = 1.0
+
+    def __init__(self, url: str, ttl: float):
+        self.url = url
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._redis = None
+        self._generations = {}
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis_asyncio
+            self._redis = redis_asyncio.from_url(self.url)
+        return self._redis
+
+    async def _generation(self, namespace: str) -> int:
+        cached = self._generations.get(namespace)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        generation = int(await self._client().get(f"response_cache:{namespace}:generation") or 0)
+        self._generations[namespace] = (generation, time.monotonic() + self.GENERATION_REFRESH_SECONDS)
+        return generation
+
+    async def key(self, namespace: str, key: str) -> str:
+        return f"response_cache:{namespace}:{await self._generation(namespace)}:{key}"
+
+    async def get(self, storage_key: str):
+        raw = await self._client().get(storage_key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        meta, body = raw.split(b"\n", 1)
+        return {**json.loads(meta), "body": body}
+
+    async def set(self, storage_key: str, entry: dict):
+        if self.ttl <= 0:
+            return
+        meta = json.dumps({k: v for k, v in entry.items() if k != "body"}).encode()
+        await self._client().set(storage_key, meta + b"\n" + entry["body"], px=int(self.ttl * 1000))
+
+    async def delete(self, namespace: str, key: Optional[str] = None):
+        if key is None:
+            generation = await self._client().incr(f"response_cache:{namespace}:generation")
+            self._generations[namespace] = (generation, time.monotonic() + self.GENERATION_REFRESH_SECONDS)
+        else:
+            await self._client().delete(await self.key(namespace, key))
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+
+    def stats(self):
+        return {"ttl_seconds": self.ttl, "hits": self.hits, "misses": self.misses}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+class ResponseCache:
+    """Serves cached GET responses, coalescing concurrent misses and answering If-None-Match with 304"""
+
+    def __init__(self, store):
+        self.store = store
+        self.flights = SingleFlight()
+        self.not_modified = 0
+        self.errors = 0
+
+    async def respond(self, request: Request, namespace: str, build, key: Optional[str] = None) -> Response:
+        """Return the cached response for this request, or await build() (a Response) and cache it.
+
+        key defaults to the path plus the sorted query string.
+        """
+        if key is None:
+            key = request.url.path
+            if request.query_params:
+                key += "?" + urlencode(sorted(request.query_params.multi_items()))
+        try:
+            storage_key = await self.store.key(namespace, key)
+            entry = await self.store.get(storage_key)
+        except Exception as e:
+            # A cache outage degrades to uncached responses, not errors
+            self.errors += 1
+            logger.error(f"Response cache lookup failed: {e}")
+            return self._respond(request, self._entry(await build()))
+        if entry is None:
+            # The storage key carries the generation read before building, so a
+            # response built across an invalidation lands in the dropped namespace
+            entry = await self.flights.do(storage_key, lambda: self._build_and_store(storage_key, build))
+        return self._respond(request, entry)
+
+    @staticmethod
+    def _entry(response: Response) -> dict:
+        body = response.body
+        return {
+            "body": body,
+            "etag": f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            "media_type": response.media_type,
+            "headers": {name: value for name, value in response.headers.items() if name not in ("content-length", "content-type")},
+        }
+
+    async def _build_and_store(self, storage_key: str, build) -> dict:
+        entry = self._entry(await build())
+        try:
+            await self.store.set(storage_key, entry)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Response cache write failed: {e}")
+        return entry
+
+    def _respond(self, request: Request, entry: dict) -> Response:
+        # no-cache: browsers may keep the body but must revalidate, which is a 304 here
+        headers = {**entry["headers"], "ETag": entry["etag"], "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type=entry["media_type"], headers=headers)
+
+    async def invalidate(self, namespace: str, key: Optional[str] = None):
+        if isinstance(self.store, LocalResponseStore):
+            try:
+                await pubsub.publish("response_cache", {"namespace": namespace, "key": key})
+                return
+            except Exception as e:
+                logger.error(f"Failed to publish response cache invalidation: {e}")
+        await self.store.delete(namespace, key)
+
+    async def close(self):
+        await self.store.close()
+
+    def stats(self):
+        return {
+            "backend": self.store.name,
+            **self.store.stats(),
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "single_flight": self.flights.stats(),
+        }
+
+def create_response_cache():
+    if os.environ.get('RESPONSE_CACHE_BACKEND', 'memory') == 'redis':
+        store = RedisResponseStore(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'), RESPONSE_CACHE_TTL_SECONDS)
+    else:
+        store = LocalResponseStore(int(os.environ.get('RESPONSE_CACHE_MAX_SIZE', 1000)), RESPONSE_CACHE_TTL_SECONDS)
+    return ResponseCache(store)
+
+response_cache = create_response_cache()
+
+async def apply_response_cache_invalidation(event: dict):
+    await response_cache.store.delete(event["namespace"], event.get("key"))
+
+pubsub.subscribe("response_cache", apply_response_cache_invalidation)
+
+# Signup pipeline
+class StageLatency:
+    """Running count/mean/max latency per named stage of a multi-step handler"""
+
+    def __init__(self):
+        self._stages = {}
+
+    def record(self, stage: str, elapsed_ms: float):
+        count, total, peak = self._stages.get(stage, (0, 0.0, 0.0))
+        self._stages[stage] = (count + 1, total + elapsed_ms, max(peak, elapsed_ms))
+
+    def timer(self):
+        return StageTimer(self)
+
+    def stats(self):
+        return {
+            stage: {"count": count, "mean_ms": round(total / count, 2), "max_ms": round(peak, 2)}
+            for stage, (count, total, peak) in self._stages.items()
+        }
+
+class StageTimer:
+    def __init__(self, latency: StageLatency):
+        self._latency = latency
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self._latency.record(stage, (now - self._last) * 1000)
+        self._last = now
+
+signup_latency = StageLatency()
+
+# "auto" detects replica sets/sharded clusters; "on"/"off" force the choice
+SIGNUP_TRANSACTIONS = os.environ.get('SIGNUP_TRANSACTIONS', 'auto')
+
+async def transactions_supported() -> bool:
+    global _transactions_supported
+    if SIGNUP_TRANSACTIONS != 'auto':
+        return SIGNUP_TRANSACTIONS == 'on'
+    if _transactions_supported is None:
+        try:
+            hello = await client.admin.command('hello')
+        except PyMongoError:
+            return False
+        _transactions_supported = 'setName' in hello or hello.get('msg') == 'isdbgrid'
+    return _transactions_supported
+
+async def run_in_transaction(write):
+    """Await write(session) inside a transaction when supported, else write(None)"""
+    if await transactions_supported():
+        async with await client.start_session() as session:
+            await session.with_transaction(write)
+    else:
+        await write(None)
+
+async def insert_user_and_profile(user_dict: dict, profile_data: dict):
+    """Write a new user and its profile so that neither exists without the other.
+
+    Uses a multi-document transaction when the deployment supports one.
+    Otherwise both inserts run concurrently and whichever succeeded is
+    removed again if the other failed. Raises DuplicateKeyError when the
+    username or email is taken.
+    """
+    if await transactions_supported():
+        async def write(session):
+            await users_collection.insert_one(user_dict, session=session)
+            await profile_collection.insert_one(profile_data, session=session)
+        await run_in_transaction(write)
+        return
+
+    user_result, profile_result = await asyncio.gather(
+        users_collection.insert_one(user_dict),
+        profile_collection.insert_one(profile_data),
+        return_exceptions=True,
+    )
+    user_failed = isinstance(user_result, BaseException)
+    profile_failed = isinstance(profile_result, BaseException)
+    if user_failed and not profile_failed:
+        await profile_collection.delete_one({"id": profile_data["id"]})
+    elif profile_failed and not user_failed:
+        await users_collection.delete_one({"id": user_dict["id"]})
+    if user_failed:
+        raise user_result
+    if profile_failed:
+        raise profile_result
+
 # Authentication Routes
 @api_router.post("/auth/signup", response_model=Token)
 async def signup(user_data: UserCreate):
-    # Check if user exists
-    existing_user = await users_collection.find_one({"$or": [{"username": user_data.username}, {"email": user_data.email}]})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Username or email already registered")
+    timer = signup_latency.timer()
     
     # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
+    timer.mark("hash")
     
     # Create user
     user = User(
@@ -209,22 +1595,13 @@ async def signup(user_data: UserCreate):
         role=user_data.role,
         full_name=user_data.full_name
     )
-    
-    # Save to users collection
     user_dict = user.dict()
     user_dict['password'] = hashed_password
+    user_dict['search_terms'] = user_search_terms(user.username, user.full_name)
+    user_dict['sport_terms'] = []
+    user_dict['achievement_terms'] = []
+    user_dict['activity_score'] = 0.0
     user_dict = prepare_for_mongo(user_dict)
-    await users_collection.insert_one(user_dict)
-    
-    # Save signup record
-    signup_record = SignupRecord(
-        username=user_data.username,
-        email=user_data.email,
-        role=user_data.role,
-        full_name=user_data.full_name
-    )
-    signup_dict = prepare_for_mongo(signup_record.dict())
-    await signup_collection.insert_one(signup_dict)
     
     # Create user profile
     profile_data = {
@@ -239,22 +1616,40 @@ async def signup(user_data: UserCreate):
         "followers_count": 0,
         "following_count": 0,
         "posts_count": 0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": to_mongo_datetime(datetime.now(timezone.utc))
     }
-    await profile_collection.insert_one(profile_data)
+    
+    # Unique indexes on username/email reject duplicates, so there is no pre-check round trip
+    try:
+        await insert_user_and_profile(user_dict, profile_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Username or email already registered")
+    timer.mark("write")
+    
+    # Save signup record
+    signup_record = SignupRecord(
+        username=user_data.username,
+        email=user_data.email,
+        role=user_data.role,
+        full_name=user_data.full_name
+    )
+    signup_dict = prepare_for_mongo(signup_record.dict())
+    await audit_writer.submit('signup', signup_dict)
+    timer.mark("audit")
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
+    timer.mark("token")
     
     return Token(access_token=access_token, token_type="bearer", user=user)
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin):
-    user_data = await users_collection.find_one({"username": user_credentials.username})
-    if not user_data or not verify_password(user_credentials.password, user_data["password"]):
+    user_data = await find_user_by_username(user_credentials.username)
+    if not user_data or not await verify_password_async(user_credentials.password, user_data["password"]):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
     # Save login record
@@ -263,7 +1658,7 @@ async def login(user_credentials: UserLogin):
         success=True
     )
     login_dict = prepare_for_mongo(login_record.dict())
-    await login_collection.insert_one(login_dict)
+    await audit_writer.submit('login', login_dict)
     
     user_data = parse_from_mongo(user_data)
     user_data.pop('password', None)  # Remove password from response
@@ -276,9 +1671,90 @@ async def login(user_credentials: UserLogin):
     
     return Token(access_token=access_token, token_type="bearer", user=user)
 
+# Home timeline
+# Fan-out on write: a new post is copied as a (user_id, post_id, created_at)
+# entry into the timeline of every follower, so reading a home feed is one
+# indexed range scan. Authors with CELEBRITY_FOLLOWER_THRESHOLD or more
+# followers are skipped at write time and merged in at read time instead.
+# Each timeline keeps only its newest TIMELINE_MAX_ENTRIES entries; older
+# posts are still reachable from the authors' profiles.
+CELEBRITY_FOLLOWER_THRESHOLD = int(os.environ.get('CELEBRITY_FOLLOWER_THRESHOLD', 10000))
+FANOUT_BATCH_SIZE = int(os.environ.get('FANOUT_BATCH_SIZE', 1000))
+TIMELINE_MAX_ENTRIES = int(os.environ.get('TIMELINE_MAX_ENTRIES', 1000))
+# Trimming costs a seek and a delete per timeline, so a fan-out trims with
+# probability 1/TIMELINE_TRIM_INTERVAL; timelines overshoot the cap by about that many entries
+TIMELINE_TRIM_INTERVAL = max(1, int(os.environ.get('TIMELINE_TRIM_INTERVAL', 10)))
+# Trims run this many at a time so a large fan-out leaves the pool to requests
+TIMELINE_TRIM_CONCURRENCY = max(1, int(os.environ.get('TIMELINE_TRIM_CONCURRENCY', 8)))
+
+# Few accounts cross the threshold, so the whole set is cached briefly
+celebrity_cache = TTLCache(max_size=1, ttl=float(os.environ.get('CELEBRITY_CACHE_TTL_SECONDS', 60)))
+
+async def get_celebrity_ids():
+    celebrity_ids = celebrity_cache.get("all")
+    if celebrity_ids is None:
+        profiles = await profile_collection.find(
+            {"followers_count": {"$gte": CELEBRITY_FOLLOWER_THRESHOLD}}, {"_id": 0, "user_id": 1}
+        ).to_list(length=None)
+        celebrity_ids = {profile["user_id"] for profile in profiles}
+        celebrity_cache.set("all", celebrity_ids)
+    return celebrity_ids
+
+async def insert_timeline_entries(entries):
+    """Insert timeline entries, ignoring ones that already exist (retries, backfills)"""
+    if not entries:
+        return
+    try:
+        await timelines_collection.insert_many(entries, ordered=False)
+    except BulkWriteError as e:
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+
+async def trim_timeline(user_id: str):
+    """Delete the entries past the newest TIMELINE_MAX_ENTRIES in one user's timeline"""
+    boundary = await timelines_collection.find(
+        {"user_id": user_id}, {"_id": 0, "created_at": 1, "post_id": 1}
+    ).sort([("created_at", -1), ("post_id", -1)]).skip(TIMELINE_MAX_ENTRIES).limit(1).to_list(length=1)
+    if boundary:
+        created_at, post_id = boundary[0]["created_at"], boundary[0]["post_id"]
+        await timelines_collection.delete_many({"user_id": user_id, "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "post_id": {"$lte": post_id}},
+        ]})
+
+async def fan_out_post(post_id: str, author_id: str, created_at):
+    """Push a new post into its author's and followers' home timelines"""
+    def entry(user_id):
+        return {"user_id": user_id, "post_id": post_id, "author_id": author_id, "created_at": created_at}
+
+    trim = random.randrange(TIMELINE_TRIM_INTERVAL) == 0
+
+    async def write(batch):
+        await insert_timeline_entries(batch)
+        if trim:
+            for start in range(0, len(batch), TIMELINE_TRIM_CONCURRENCY):
+                chunk = batch[start:start + TIMELINE_TRIM_CONCURRENCY]
+                await asyncio.gather(*(trim_timeline(item["user_id"]) for item in chunk))
+
+    try:
+        profile = await profile_collection.find_one({"user_id": author_id}, {"_id": 0, "followers_count": 1})
+        if profile and profile.get("followers_count", 0) >= CELEBRITY_FOLLOWER_THRESHOLD:
+            await write([entry(author_id)])
+            return
+
+        batch = [entry(author_id)]
+        async for edge in follows_collection.find({"followee_id": author_id}, {"_id": 0, "follower_id": 1}):
+            batch.append(entry(edge["follower_id"]))
+            if len(batch) >= FANOUT_BATCH_SIZE:
+                await write(batch)
+                batch = []
+        await write(batch)
+    except PyMongoError as e:
+        logger.error(f"Timeline fan-out for post {post_id} failed: {e}")
+
 # Posts Routes
 @api_router.post("/posts", response_model=Post)
-async def create_post(post_data: PostCreate, current_user: User = Depends(get_current_user)):
+async def create_post(post_data: PostCreate, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
     post = Post(
         user_id=current_user.id,
         username=current_user.username,
@@ -287,7 +1763,8 @@ async def create_post(post_data: PostCreate, current_user: User = Depends(get_cu
         post_type=post_data.post_type,
         image_url=post_data.image_url,
         video_url=post_data.video_url,
-        sports_tags=post_data.sports_tags
+        # Stored normalised so tag search is an exact match on the multikey index
+        sports_tags=normalize_tags(post_data.sports_tags)
     )
     
     post_dict = prepare_for_mongo(post.dict())
@@ -299,25 +1776,574 @@ async def create_post(post_data: PostCreate, current_user: User = Depends(get_cu
         {"$inc": {"posts_count": 1}}
     )
     
+    # Followers' timelines are updated after the response is sent
+    background_tasks.add_task(fan_out_post, post.id, post.user_id, post_dict["created_at"])
+    background_tasks.add_task(record_activity, current_user.id, "post", post.created_at)
+    await response_cache.invalidate("posts")
+    await publish_feed_event("post", jsonable_encoder(post))
+    
     return post
 
 @api_router.get("/posts", response_model=List[Post])
-async def get_posts(skip: int = 0, limit: int = 20):
-    posts_data = await posts_collection.find({}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=None)
-    posts = []
-    for post_data in posts_data:
-        post_data = parse_from_mongo(post_data)
-        posts.append(Post(**post_data))
-    return posts
+async def get_posts(request: Request, skip: int = 0, limit: int = 20, cursor: Optional[str] = None, preview_comments: int = 0):
+    # Like and comment counts in a cached page can lag by up to the cache TTL;
+    # the live stream carries them in the meantime
+    async def build():
+        # skip is kept for existing clients; cursor (from X-Next-Cursor) takes precedence
+        posts_data, next_cursor = await fetch_post_page(
+            {}, limit, cursor=cursor, skip=skip, projection=POST_PROJECTION
+        )
+        await attach_comment_previews(posts_data, preview_comments)
+        return post_page_response(posts_data, next_cursor)
+    
+    return await response_cache.respond(request, "posts", build)
 
 @api_router.get("/posts/user/{user_id}", response_model=List[Post])
-async def get_user_posts(user_id: str):
-    posts_data = await posts_collection.find({"user_id": user_id}).sort("created_at", -1).to_list(length=None)
-    posts = []
+async def get_user_posts(user_id: str, limit: int = 50, cursor: Optional[str] = None, preview_comments: int = 0):
+    # Capped at MAX_PAGE_SIZE; older posts are reached by following X-Next-Cursor
+    posts_data, next_cursor = await fetch_post_page(
+        {"user_id": user_id}, limit, cursor=cursor, projection=POST_PROJECTION
+    )
+    await attach_comment_previews(posts_data, preview_comments)
+    return post_page_response(posts_data, next_cursor)
+
+def merge_feed_candidates(candidates, limit: int):
+    """Merge (created_at, post_id) pairs from the timeline and celebrity sources, newest first.
+
+    A post can come from both if its author just crossed the celebrity
+    threshold. Timestamps are compared as datetimes because either source
+    may still hold ISO strings while migrate_datetimes.py is catching up.
+    Returns the first `limit` pairs and whether any were left over.
+    """
+    created_by_id = {}
+    for created_at, post_id in candidates:
+        created_by_id.setdefault(post_id, created_at)
+    ordered = sorted(created_by_id.items(), key=lambda item: (as_datetime(item[1]), item[0]), reverse=True)
+    return [(created_at, post_id) for post_id, created_at in ordered[:limit]], len(ordered) > limit
+
+@api_router.get("/feed", response_model=List[Post])
+async def get_feed(limit: int = 20, cursor: Optional[str] = None, preview_comments: int = 0, current_user: User = Depends(get_current_user)):
+    """Home timeline: the user's own posts and posts from accounts they follow, newest first"""
+    limit = clamp_page_size(limit)
+    timeline_query = {"user_id": current_user.id}
+    if cursor:
+        timeline_query.update(keyset_filter(cursor, id_field="post_id"))
+    entries = await timelines_collection.find(
+        timeline_query, {"_id": 0, "post_id": 1, "created_at": 1}
+    ).sort([("created_at", -1), ("post_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+    candidates = [(entry["created_at"], entry["post_id"]) for entry in entries]
+    timeline_more = len(entries) > limit
+    celebrity_more = False
+    
+    # Celebrity posts were not fanned out; read them from the authors directly
+    celebrity_posts = {}
+    celebrity_ids = await get_celebrity_ids()
+    if celebrity_ids:
+        followed = await follows_collection.find(
+            {"follower_id": current_user.id, "followee_id": {"$in": list(celebrity_ids)}},
+            {"_id": 0, "followee_id": 1}
+        ).to_list(length=None)
+        if followed:
+            celebrity_page, celebrity_cursor = await fetch_post_page(
+                {"user_id": {"$in": [edge["followee_id"] for edge in followed]}},
+                limit, cursor=cursor, projection=POST_PROJECTION
+            )
+            celebrity_posts = {post["id"]: post for post in celebrity_page}
+            candidates.extend((post["created_at"], post["id"]) for post in celebrity_page)
+            celebrity_more = celebrity_cursor is not None
+    
+    candidates, merged_more = merge_feed_candidates(candidates, limit)
+    has_more = timeline_more or celebrity_more or merged_more
+    next_cursor = encode_cursor(*candidates[-1]) if has_more and candidates else None
+    
+    missing = [post_id for _, post_id in candidates if post_id not in celebrity_posts]
+    posts_by_id = dict(celebrity_posts)
+    if missing:
+        async for post in posts_collection.find({"id": {"$in": missing}}, POST_PROJECTION):
+            posts_by_id[post["id"]] = post
+    posts_data = [posts_by_id[post_id] for _, post_id in candidates if post_id in posts_by_id]
+    await attach_comment_previews(posts_data, preview_comments)
+    return post_page_response(posts_data, next_cursor)
+
+# Comment Routes
+MAX_COMMENT_PREVIEWS = 5
+MAX_COMMENT_LENGTH = 2000
+COMMENT_FIELDS = ["id", "post_id", "user_id", "username", "content", "created_at"]
+
+async def attach_comment_previews(posts_data: list, count: int):
+    """Add each post's newest `count` comments as latest_comments, in one aggregation.
+
+    The $lookup sub-pipeline walks post_id_created_at_id and stops after
+    `count` comments per post, so the cost is bounded by the page, not by
+    how busy its threads are. Works on MongoDB 4.4.
+    """
+    count = min(count, MAX_COMMENT_PREVIEWS)
+    if count <= 0 or not posts_data:
+        return
+    groups = await posts_collection.aggregate([
+        {"$match": {"id": {"$in": [post["id"] for post in posts_data]}}},
+        {"$project": {"_id": 0, "id": 1}},
+        {"$lookup": {
+            "from": comments_collection.name,
+            "let": {"post_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$post_id", "$$post_id"]}}},
+                {"$sort": {"created_at": -1, "id": -1}},
+                {"$limit": count},
+                {"$project": {"_id": 0, **{field: 1 for field in COMMENT_FIELDS}}},
+            ],
+            "as": "comments",
+        }},
+    ]).to_list(length=None)
+    previews = {group["id"]: group["comments"] for group in groups}
+    for post in posts_data:
+        post["latest_comments"] = previews.get(post["id"], [])
+
+@api_router.post("/posts/{post_id}/comments", response_model=Comment)
+async def create_comment(post_id: str, comment_data: CommentCreate, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
+    if not comment_data.content.strip():
+        raise HTTPException(status_code=400, detail="Comment is empty")
+    if len(comment_data.content) > MAX_COMMENT_LENGTH:
+        raise HTTPException(status_code=400, detail="Comment too long")
+    await get_post_ref(post_id)
+    comment = Comment(
+        post_id=post_id,
+        user_id=current_user.id,
+        username=current_user.username,
+        content=comment_data.content
+    )
+    comment_dict = prepare_for_mongo(comment.dict())
+    comments = 0
+    
+    async def write(session):
+        nonlocal comments
+        await comments_collection.insert_one(comment_dict, session=session)
+        comments = await increment_post_counter(post_id, "comments", 1, session=session)
+    
+    await run_in_transaction(write)
+    await publish_feed_event("post_counts", {"post_id": post_id, "comments": comments})
+    background_tasks.add_task(record_activity, current_user.id, "comment", comment.created_at)
+    return comment
+
+@api_router.get("/posts/{post_id}/comments", response_model=List[Comment])
+async def get_comments(post_id: str, response: Response, limit: int = 20, cursor: Optional[str] = None):
+    limit = clamp_page_size(limit)
+    query = {"post_id": post_id}
+    if cursor:
+        query.update(keyset_filter(cursor))
+    comments_data = await comments_collection.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    if len(comments_data) > limit:
+        comments_data = comments_data[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(comments_data[-1]["created_at"], comments_data[-1]["id"])
+    return [Comment(**parse_from_mongo(comment_data)) for comment_data in comments_data]
+
+# Like Routes
+async def get_post_ref(post_id: str):
+    post = await posts_collection.find_one({"id": post_id}, {"_id": 0, "id": 1, "likes": 1, "comments": 1})
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return post
+
+async def increment_post_counter(post_id: str, field: str, delta: int, session=None) -> int:
+    """Atomically $inc a post counter and return its new value in the same round trip"""
+    post = await posts_collection.find_one_and_update(
+        {"id": post_id}, {"$inc": {field: delta}},
+        projection={"_id": 0, field: 1}, return_document=ReturnDocument.AFTER, session=session
+    )
+    return post.get(field, 0) if post else 0
+
+@api_router.get("/posts/likes", response_model=LikedPosts)
+async def get_liked_posts(post_ids: str, current_user: User = Depends(get_current_user)):
+    """Which of a page of posts (comma-separated ids) the current user has liked, in one query"""
+    ids = [post_id for post_id in post_ids.split(",") if post_id][:MAX_PAGE_SIZE]
+    likes = await likes_collection.find(
+        {"post_id": {"$in": ids}, "user_id": current_user.id}, {"_id": 0, "post_id": 1}
+    ).to_list(length=len(ids))
+    return LikedPosts(liked=[like["post_id"] for like in likes])
+
+@api_router.post("/posts/{post_id}/like", response_model=LikeStatus)
+async def like_post(post_id: str, current_user: User = Depends(get_current_user)):
+    post = await get_post_ref(post_id)
+    like_dict = prepare_for_mongo(Like(post_id=post_id, user_id=current_user.id).dict())
+    likes = post.get("likes", 0)
+    
+    async def write(session):
+        nonlocal likes
+        await likes_collection.insert_one(like_dict, session=session)
+        likes = await increment_post_counter(post_id, "likes", 1, session=session)
+    
+    # The unique (post_id, user_id) index makes repeat likes a no-op
+    try:
+        await run_in_transaction(write)
+    except DuplicateKeyError:
+        pass
+    else:
+        await publish_feed_event("post_counts", {"post_id": post_id, "likes": likes})
+    return LikeStatus(post_id=post_id, liked=True, likes=likes)
+
+@api_router.delete("/posts/{post_id}/like", response_model=LikeStatus)
+async def unlike_post(post_id: str, current_user: User = Depends(get_current_user)):
+    post = await get_post_ref(post_id)
+    likes = post.get("likes", 0)
+    
+    removed = False
+    
+    async def write(session):
+        nonlocal likes, removed
+        result = await likes_collection.delete_one({"post_id": post_id, "user_id": current_user.id}, session=session)
+        if result.deleted_count:
+            likes = await increment_post_counter(post_id, "likes", -1, session=session)
+            removed = True
+    
+    await run_in_transaction(write)
+    if removed:
+        await publish_feed_event("post_counts", {"post_id": post_id, "likes": likes})
+    return LikeStatus(post_id=post_id, liked=False, likes=likes)
+
+# Search Routes
+# Text queries rank by textScore decayed by age (halving every
+# SEARCH_RECENCY_HALF_LIFE_HOURS), measured from a reference time fixed by
+# the first page and carried in the cursor, so later pages see the same
+# scores. #tags in the query filter on sports_tags; a tag-only query is
+# plain newest-first over the tag index.
+SEARCH_RECENCY_HALF_LIFE_HOURS = float(os.environ.get('SEARCH_RECENCY_HALF_LIFE_HOURS', 72))
+MAX_SEARCH_QUERY_LENGTH = 200
+
+def encode_search_cursor(score: float, item_id: str, reference: datetime) -> str:
+    raw = json.dumps({"s": score, "i": item_id, "r": reference.isoformat()}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return float(data["s"]), str(data["i"]), datetime.fromisoformat(data["r"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_search_query(q: str):
+    """Split a query into free text and #tags"""
+    words = q.split()
+    tags = [normalize_tag(word) for word in words if word.startswith("#")]
+    text = " ".join(word for word in words if not word.startswith("#"))
+    return text, [tag for tag in dict.fromkeys(tags) if tag]
+
+async def search_post_page(text: str, tags: List[str], limit: int, cursor: Optional[str] = None):
+    """One page of matching posts, best first, and the cursor for the page after it"""
+    limit = clamp_page_size(limit)
+    query = {"sports_tags": {"$all": tags}} if tags else {}
+    if not text:
+        return await fetch_post_page(query, limit, cursor=cursor, projection=POST_PROJECTION)
+    
+    if cursor:
+        after_score, after_id, reference = decode_search_cursor(cursor)
+    else:
+        reference = datetime.now(timezone.utc)
+    decay_per_ms = math.log(2) / (SEARCH_RECENCY_HALF_LIFE_HOURS * 3600 * 1000)
+    pipeline = [
+        {"$match": {"$text": {"$search": text}, **query, "created_at": {"$lte": to_mongo_datetime(reference)}}},
+        {"$addFields": {"_score": {"$multiply": [
+            {"$meta": "textScore"},
+            {"$exp": {"$multiply": [-decay_per_ms, {"$subtract": [reference, {"$toDate": "$created_at"}]}]}},
+        ]}}},
+    ]
+    if cursor:
+        pipeline.append({"$match": {"$or": [
+            {"_score": {"$lt": after_score}},
+            {"_score": after_score, "id": {"$lt": after_id}},
+        ]}})
+    pipeline += [
+        {"$sort": {"_score": -1, "id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {**POST_PROJECTION, "_score": 1}},
+    ]
+    posts_data = await posts_collection.aggregate(pipeline).to_list(length=limit + 1)
+    next_cursor = None
+    if len(posts_data) > limit:
+        posts_data = posts_data[:limit]
+        next_cursor = encode_search_cursor(posts_data[-1]["_score"], posts_data[-1]["id"], reference)
     for post_data in posts_data:
-        post_data = parse_from_mongo(post_data)
-        posts.append(Post(**post_data))
-    return posts
+        del post_data["_score"]
+    return posts_data, next_cursor
+
+@api_router.get("/search/posts", response_model=List[Post])
+async def search_posts(q: str, limit: int = 20, cursor: Optional[str] = None):
+    """Posts matching words and/or #tags in q, most relevant and recent first; next page via X-Next-Cursor"""
+    if len(q) > MAX_SEARCH_QUERY_LENGTH:
+        raise HTTPException(status_code=400, detail="Search query too long")
+    text, tags = parse_search_query(q)
+    if not text and not tags:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    posts_data, next_cursor = await search_post_page(text, tags, limit, cursor)
+    return post_page_response(posts_data, next_cursor)
+
+# Typeahead: only prefixes this short are cached; they match the most users and
+# repeat the most, longer ones are cheap index range scans anyway
+USER_SEARCH_CACHED_PREFIX_LENGTH = int(os.environ.get('USER_SEARCH_CACHED_PREFIX_LENGTH', 3))
+MAX_USER_SUGGESTIONS = 20
+USER_SUGGESTION_PROJECTION = {"_id": 0, **{field: 1 for field in UserSuggestion.model_fields}}
+
+user_search_cache = TTLCache(
+    max_size=int(os.environ.get('USER_SEARCH_CACHE_MAX_SIZE', 5000)),
+    ttl=float(os.environ.get('USER_SEARCH_CACHE_TTL_SECONDS', 60)),
+)
+
+async def find_user_suggestions(prefix: str, limit: int) -> List[dict]:
+    # Index order, not ranked: sorting would have to read every match of a short prefix.
+    # $elemMatch makes one term satisfy both bounds; a bare range on the array would
+    # match users with one term above the prefix and another below it.
+    return await users_collection.find(
+        {"search_terms": {"$elemMatch": prefix_range(prefix)}}, USER_SUGGESTION_PROJECTION
+    ).limit(limit).to_list(length=limit)
+
+@api_router.get("/search/users", response_model=List[UserSuggestion])
+async def search_users(q: str, limit: int = 10):
+    """Users whose username, full name, or any word of either starts with q"""
+    prefix = normalize_search_text(q)[:MAX_SEARCH_QUERY_LENGTH]
+    if not prefix:
+        return []
+    limit = max(1, min(limit, MAX_USER_SUGGESTIONS))
+    
+    if len(prefix) > USER_SEARCH_CACHED_PREFIX_LENGTH:
+        return await find_user_suggestions(prefix, limit)
+    key = (prefix, limit)
+    suggestions = user_search_cache.get(key)
+    if suggestions is None:
+        suggestions = await lookup_flights.do(("users.search_terms", key), lambda: find_user_suggestions(prefix, limit))
+        user_search_cache.set(key, suggestions)
+    return suggestions
+
+# Trending tags
+class TrendingTags:
+    """Sports tag counts over a sliding window, kept in memory.
+
+    The window is a ring of bucket_count Counters of bucket_seconds each; a
+    bucket is emptied when it falls out of the window. Totals for the whole
+    window are maintained alongside, so the default view never sums buckets.
+    """
+
+    def __init__(self, bucket_seconds: int, bucket_count: int):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self._buckets = [Counter() for _ in range(bucket_count)]
+        self._bucket_ids = [None] * bucket_count
+        self._totals = Counter()
+        self._current = None
+        # Posts created before this were counted by the warm start
+        self.counted_until = None
+        self.recorded = 0
+
+    def _bucket_id(self, at: datetime) -> int:
+        return int(at.timestamp() // self.bucket_seconds)
+
+    def _advance(self, bucket_id: int):
+        """Expire buckets that are outside the window ending at bucket_id"""
+        if self._current is not None and bucket_id <= self._current:
+            return
+        self._current = bucket_id
+        oldest = bucket_id - self.bucket_count + 1
+        for slot, slot_id in enumerate(self._bucket_ids):
+            if slot_id is not None and slot_id < oldest:
+                for tag, count in self._buckets[slot].items():
+                    self._totals[tag] -= count
+                    if self._totals[tag] <= 0:
+                        del self._totals[tag]
+                self._buckets[slot].clear()
+                self._bucket_ids[slot] = None
+
+    def add(self, bucket_id: int, tag: str, count: int = 1):
+        self._advance(self._bucket_id(datetime.now(timezone.utc)))
+        # Clock skew between workers can put a post slightly in the future
+        bucket_id = min(bucket_id, self._current)
+        if bucket_id <= self._current - self.bucket_count:
+            return
+        slot = bucket_id % self.bucket_count
+        self._bucket_ids[slot] = bucket_id
+        self._buckets[slot][tag] += count
+        self._totals[tag] += count
+
+    def record(self, tags: List[str], at: datetime):
+        if self.counted_until is not None and at < self.counted_until:
+            return
+        self.recorded += 1
+        bucket_id = self._bucket_id(at)
+        for tag in tags:
+            self.add(bucket_id, tag)
+
+    def top(self, limit: int, hours: float) -> List[tuple]:
+        """The limit most used tags over the last `hours`, as (tag, count)"""
+        self._advance(self._bucket_id(datetime.now(timezone.utc)))
+        buckets = min(self.bucket_count, max(1, math.ceil(hours * 3600 / self.bucket_seconds)))
+        if buckets == self.bucket_count:
+            counts = self._totals
+        else:
+            counts = Counter()
+            for slot, slot_id in enumerate(self._bucket_ids):
+                if slot_id is not None and slot_id > self._current - buckets:
+                    counts.update(self._buckets[slot])
+        return heapq.nsmallest(limit, counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def stats(self):
+        return {
+            "tags": len(self._totals),
+            "window_hours": self.bucket_seconds * self.bucket_count / 3600,
+            "recorded_posts": self.recorded,
+            "warm_started": self.counted_until is not None,
+        }
+
+trending_tags = TrendingTags(
+    bucket_seconds=int(os.environ.get('TRENDING_BUCKET_SECONDS', 300)),
+    bucket_count=int(os.environ.get('TRENDING_BUCKETS', 288)),
+)
+MAX_TRENDING_TAGS = 50
+# Without a shared pub/sub a worker only sees its own posts, so counts are
+# pulled from MongoDB every TRENDING_REFRESH_SECONDS instead. Posts are read
+# TRENDING_REFRESH_LAG_SECONDS behind now so ones still being inserted are not skipped.
+TRENDING_REFRESH_SECONDS = float(os.environ.get('TRENDING_REFRESH_SECONDS', 30))
+TRENDING_REFRESH_LAG_SECONDS = 5
+
+async def record_trending_tags(event: dict):
+    # With a shared pub/sub every worker sees every new post on the feed channel
+    if event["type"] == "post" and event["data"].get("sports_tags"):
+        created_at = datetime.fromisoformat(event["data"]["created_at"].replace('Z', '+00:00'))
+        trending_tags.record(event["data"]["sports_tags"], created_at)
+
+if pubsub.name != "memory":
+    pubsub.subscribe("feed_events", record_trending_tags)
+
+async def count_trending_posts(since: datetime, until: datetime):
+    """Add the tags of posts created in [since, until), grouped in MongoDB by bucket and tag"""
+    bucket_ms = trending_tags.bucket_seconds * 1000
+    pipeline = [
+        {"$match": {
+            "created_at": {"$gte": to_mongo_datetime(since), "$lt": to_mongo_datetime(until)},
+            "sports_tags.0": {"$exists": True},
+        }},
+        {"$project": {"_id": 0, "sports_tags": 1, "bucket": {"$floor": {"$divide": [{"$toLong": {"$toDate": "$created_at"}}, bucket_ms]}}}},
+        {"$unwind": "$sports_tags"},
+        {"$group": {"_id": {"bucket": "$bucket", "tag": "$sports_tags"}, "count": {"$sum": 1}}},
+    ]
+    # Read everything before counting so a failed query adds nothing and can be retried
+    rows = await posts_collection.aggregate(pipeline).to_list(length=None)
+    for row in rows:
+        trending_tags.add(int(row["_id"]["bucket"]), row["_id"]["tag"], row["count"])
+
+async def warm_start_trending_tags():
+    """Load the current window's counts from posts once"""
+    if os.environ.get('TRENDING_WARM_START', 'true').lower() != 'true':
+        return
+    until = datetime.now(timezone.utc)
+    since = until - timedelta(seconds=trending_tags.bucket_seconds * trending_tags.bucket_count)
+    trending_tags.counted_until = until
+    try:
+        await count_trending_posts(since, until)
+    except PyMongoError as e:
+        logger.error(f"Trending tags warm start failed, counting from now: {e}")
+
+async def run_trending_tags():
+    """Warm start, then with the in-memory pub/sub keep counting new posts from MongoDB"""
+    await warm_start_trending_tags()
+    if pubsub.name != "memory":
+        return
+    if trending_tags.counted_until is None:
+        trending_tags.counted_until = datetime.now(timezone.utc)
+    while True:
+        await asyncio.sleep(TRENDING_REFRESH_SECONDS)
+        until = datetime.now(timezone.utc) - timedelta(seconds=TRENDING_REFRESH_LAG_SECONDS)
+        if until <= trending_tags.counted_until:
+            continue
+        try:
+            await count_trending_posts(trending_tags.counted_until, until)
+        except PyMongoError as e:
+            logger.error(f"Trending tags refresh failed, retrying: {e}")
+            continue
+        trending_tags.counted_until = until
+
+@api_router.get("/trending", response_model=List[TrendingTag])
+async def get_trending(hours: float = Query(24, gt=0), limit: int = 10):
+    """Most used sports tags over the last `hours` (up to the tracked window)"""
+    if not math.isfinite(hours):
+        raise HTTPException(status_code=422, detail="hours must be a finite number")
+    limit = max(1, min(limit, MAX_TRENDING_TAGS))
+    return [TrendingTag(tag=tag, count=count) for tag, count in trending_tags.top(limit, hours)]
+
+# Discovery Routes
+MAX_ACHIEVEMENT_KEYWORDS = 5
+MAX_ACTIVE_WITHIN_DAYS = 365
+
+async def record_activity(user_id: str, kind: str, at: datetime):
+    """Add one activity to the user's discovery ranking; runs after the response is sent"""
+    await users_collection.update_one(
+        {"id": user_id},
+        {"$inc": {"activity_score": ACTIVITY_WEIGHTS[kind] * activity_growth(at)},
+         "$max": {"last_active_at": to_mongo_datetime(at)}}
+    )
+
+def encode_score_cursor(score: float, item_id: str) -> str:
+    raw = json.dumps({"s": score, "i": item_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_score_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return float(data["s"]), str(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def athlete_discovery_query(sport: Optional[str] = None, achievement: Optional[str] = None,
+                            active_within_days: Optional[float] = None, cursor: Optional[str] = None) -> dict:
+    """Filter for athletes, shaped so one of the role_* indexes serves the equality and the sort"""
+    query = {"role": UserRole.ATHLETE}
+    if sport:
+        query["sport_terms"] = normalize_search_text(sport)
+    if achievement:
+        keywords = achievement_terms([achievement])[:MAX_ACHIEVEMENT_KEYWORDS]
+        if keywords:
+            query["achievement_terms"] = {"$all": keywords}
+    if active_within_days:
+        since = datetime.now(timezone.utc) - timedelta(days=active_within_days)
+        query["last_active_at"] = {"$gte": to_mongo_datetime(since)}
+    if cursor:
+        score, item_id = decode_score_cursor(cursor)
+        query["$or"] = [
+            {"activity_score": {"$lt": score}},
+            {"activity_score": score, "id": {"$lt": item_id}},
+        ]
+    return query
+
+async def discover_athlete_page(query: dict, limit: int):
+    limit = clamp_page_size(limit)
+    projection = {"_id": 0, "activity_score": 1, **{field: 1 for field in AthleteCard.model_fields if field != "activity"}}
+    athletes = await users_collection.find(query, projection).sort(
+        [("activity_score", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = None
+    if len(athletes) > limit:
+        athletes = athletes[:limit]
+        next_cursor = encode_score_cursor(athletes[-1].get("activity_score", 0.0), athletes[-1]["id"])
+    return athletes, next_cursor
+
+@api_router.get("/discover/athletes", response_model=List[AthleteCard])
+async def discover_athletes(response: Response, sport: Optional[str] = None, achievement: Optional[str] = None,
+                            active_within_days: Optional[float] = Query(None, gt=0, le=MAX_ACTIVE_WITHIN_DAYS),
+                            limit: int = 20, cursor: Optional[str] = None,
+                            current_user: User = Depends(get_current_user)):
+    """Athletes for scouts, most active first, optionally by sport, achievement keywords and recent activity"""
+    if current_user.role != UserRole.SCOUT:
+        raise HTTPException(status_code=403, detail="Only scouts can discover athletes")
+    query = athlete_discovery_query(sport, achievement, active_within_days, cursor)
+    athletes, next_cursor = await discover_athlete_page(query, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    now_growth = activity_growth(datetime.now(timezone.utc))
+    cards = []
+    for athlete in athletes:
+        activity = athlete.pop("activity_score", 0.0) or 0.0
+        cards.append(AthleteCard(**parse_from_mongo(athlete), activity=round(activity / now_growth, 4)))
+    return cards
 
 # User Profile Routes
 @api_router.get("/users/me", response_model=User)
@@ -325,14 +2351,18 @@ async def get_current_user_profile(current_user: User = Depends(get_current_user
     return current_user
 
 @api_router.get("/users/{username}", response_model=User)
-async def get_user_profile(username: str):
-    user_data = await users_collection.find_one({"username": username})
-    if not user_data:
-        raise HTTPException(status_code=404, detail="User not found")
+async def get_user_profile(username: str, request: Request):
+    async def build():
+        user_data = await find_user_by_username(username)
+        if not user_data:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        user_data = parse_from_mongo(user_data)
+        user_data.pop('password', None)  # Remove password
+        return Response(content=json.dumps(jsonable_encoder(User(**user_data))), media_type="application/json")
     
-    user_data = parse_from_mongo(user_data)
-    user_data.pop('password', None)  # Remove password
-    return User(**user_data)
+    # Keyed on the username alone so an update can drop it whatever query string was used
+    return await response_cache.respond(request, "users", build, key=username)
 
 @api_router.put("/users/me", response_model=User)
 async def update_user_profile(user_update: UserUpdate, current_user: User = Depends(get_current_user)):
@@ -350,10 +2380,18 @@ async def update_user_profile(user_update: UserUpdate, current_user: User = Depe
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
+    # Drop the cached copy first so no request sees the old profile after the write
+    user_cache.invalidate(current_user.username)
+    
     # Update user in users collection
+    user_fields = dict(update_data)
+    if 'full_name' in update_data:
+        user_fields['search_terms'] = user_search_terms(current_user.username, update_data['full_name'])
+    if 'sports_interests' in update_data:
+        user_fields['sport_terms'] = sport_terms(update_data['sports_interests'])
     result = await users_collection.update_one(
         {"id": current_user.id}, 
-        {"$set": update_data}
+        {"$set": user_fields}
     )
     
     if result.matched_count == 0:
@@ -372,13 +2410,310 @@ async def update_user_profile(user_update: UserUpdate, current_user: User = Depe
     
     updated_user_data = parse_from_mongo(updated_user_data)
     updated_user_data.pop('password', None)
-    return User(**updated_user_data)
+    updated_user = User(**updated_user_data)
+    user_cache.set(current_user.username, updated_user)
+    await response_cache.invalidate("users", current_user.username)
+    return updated_user
+
+# Follow Routes
+TIMELINE_BACKFILL_POSTS = int(os.environ.get('TIMELINE_BACKFILL_POSTS', 20))
+
+async def get_user_ref(username: str):
+    user_data = await users_collection.find_one({"username": username}, {"_id": 0, "id": 1, "username": 1})
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_data
+
+async def backfill_timeline(follower_id: str, followee_id: str):
+    """Seed a new follower's timeline with the followee's recent posts"""
+    if followee_id in await get_celebrity_ids():
+        return
+    try:
+        posts = await posts_collection.find(
+            {"user_id": followee_id}, {"_id": 0, "id": 1, "created_at": 1}
+        ).sort([("created_at", -1), ("id", -1)]).limit(TIMELINE_BACKFILL_POSTS).to_list(length=TIMELINE_BACKFILL_POSTS)
+        await insert_timeline_entries([
+            {"user_id": follower_id, "post_id": post["id"], "author_id": followee_id, "created_at": post["created_at"]}
+            for post in posts
+        ])
+    except PyMongoError as e:
+        logger.error(f"Timeline backfill for {follower_id} <- {followee_id} failed: {e}")
+
+async def purge_timeline(follower_id: str, followee_id: str):
+    try:
+        await timelines_collection.delete_many({"user_id": follower_id, "author_id": followee_id})
+    except PyMongoError as e:
+        logger.error(f"Timeline purge for {follower_id} <- {followee_id} failed: {e}")
+
+async def adjust_follow_counts(follower_id: str, followee_id: str, delta: int, session=None):
+    follower_update = profile_collection.update_one(
+        {"user_id": follower_id}, {"$inc": {"following_count": delta}}, session=session
+    )
+    followee_update = profile_collection.update_one(
+        {"user_id": followee_id}, {"$inc": {"followers_count": delta}}, session=session
+    )
+    if session is None:
+        await asyncio.gather(follower_update, followee_update)
+    else:
+        # A session cannot run two operations at once
+        await follower_update
+        await followee_update
+
+@api_router.post("/users/{username}/follow", response_model=FollowStatus)
+async def follow_user(username: str, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
+    followee = await get_user_ref(username)
+    if followee["id"] == current_user.id:
+        raise HTTPException(status_code=400, detail="You cannot follow yourself")
+    
+    edge = FollowEdge(
+        follower_id=current_user.id,
+        follower_username=current_user.username,
+        followee_id=followee["id"],
+        followee_username=followee["username"]
+    )
+    edge_dict = prepare_for_mongo(edge.dict())
+    
+    async def write(session):
+        await follows_collection.insert_one(edge_dict, session=session)
+        await adjust_follow_counts(current_user.id, followee["id"], 1, session=session)
+    
+    # The unique (follower_id, followee_id) index makes repeat follows a no-op
+    try:
+        await run_in_transaction(write)
+    except DuplicateKeyError:
+        return FollowStatus(username=followee["username"], following=True)
+    
+    background_tasks.add_task(backfill_timeline, current_user.id, followee["id"])
+    background_tasks.add_task(drop_suggestion, current_user.id, followee["id"])
+    return FollowStatus(username=followee["username"], following=True)
+
+@api_router.delete("/users/{username}/follow", response_model=FollowStatus)
+async def unfollow_user(username: str, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
+    followee = await get_user_ref(username)
+    
+    async def write(session):
+        result = await follows_collection.delete_one(
+            {"follower_id": current_user.id, "followee_id": followee["id"]}, session=session
+        )
+        # Only the request that actually removed the edge adjusts the counters
+        if result.deleted_count:
+            await adjust_follow_counts(current_user.id, followee["id"], -1, session=session)
+    
+    await run_in_transaction(write)
+    background_tasks.add_task(purge_timeline, current_user.id, followee["id"])
+    return FollowStatus(username=followee["username"], following=False)
+
+async def list_follow_edges(query: dict, limit: int, cursor: Optional[str]):
+    limit = clamp_page_size(limit)
+    if cursor:
+        query = {**query, **keyset_filter(cursor)}
+    edges = await follows_collection.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = None
+    if len(edges) > limit:
+        edges = edges[:limit]
+        next_cursor = encode_cursor(edges[-1]["created_at"], edges[-1]["id"])
+    return [FollowEdge(**parse_from_mongo(edge)) for edge in edges], next_cursor
+
+# Follow suggestions are computed offline by compute_follow_suggestions.py;
+# serving them is a single read of the user's document
+MAX_FOLLOW_SUGGESTIONS = 50
+
+async def drop_suggestion(user_id: str, followed_id: str):
+    await suggestions_collection.update_one({"user_id": user_id}, {"$pull": {"suggestions": {"user_id": followed_id}}})
+
+@api_router.get("/users/me/suggestions", response_model=List[FollowSuggestion])
+async def get_follow_suggestions(limit: int = 10, current_user: User = Depends(get_current_user)):
+    """Who to follow, best first; empty until the batch job has run since the user signed up"""
+    limit = max(1, min(limit, MAX_FOLLOW_SUGGESTIONS))
+    entry = await suggestions_collection.find_one(
+        {"user_id": current_user.id}, {"_id": 0, "suggestions": {"$slice": limit}}
+    )
+    return entry["suggestions"] if entry else []
+
+@api_router.get("/users/{username}/followers", response_model=List[FollowEdge])
+async def get_followers(username: str, response: Response, limit: int = 50, cursor: Optional[str] = None):
+    user_ref = await get_user_ref(username)
+    edges, next_cursor = await list_follow_edges({"followee_id": user_ref["id"]}, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return edges
+
+@api_router.get("/users/{username}/following", response_model=List[FollowEdge])
+async def get_following(username: str, response: Response, limit: int = 50, cursor: Optional[str] = None):
+    user_ref = await get_user_ref(username)
+    edges, next_cursor = await list_follow_edges({"follower_id": user_ref["id"]}, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return edges
+
+# Messaging Routes
+MAX_MESSAGE_LENGTH = 5000
+
+async def get_message_recipient(sender: User, recipient_username: str, content: str):
+    if len(content) > MAX_MESSAGE_LENGTH:
+        raise HTTPException(status_code=400, detail="Message too long")
+    if recipient_username == sender.username:
+        raise HTTPException(status_code=400, detail="You cannot message yourself")
+    return await get_user_ref(recipient_username)
+
+def require_participant(conversation_id: str, user: User):
+    if user.id not in conversation_id.split(":"):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+@api_router.post("/messages", response_model=Message)
+async def create_message(message_data: MessageCreate, current_user: User = Depends(get_current_user)):
+    if not message_data.content.strip():
+        raise HTTPException(status_code=400, detail="Message is empty")
+    recipient = await get_message_recipient(current_user, message_data.to, message_data.content)
+    return await send_direct_message(current_user, recipient, message_data.content)
+
+@api_router.get("/conversations", response_model=List[InboxEntry])
+async def get_conversations(response: Response, limit: int = 20, cursor: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """The user's conversations, most recent first, with unread counts"""
+    limit = clamp_page_size(limit)
+    query = {"user_id": current_user.id}
+    if cursor:
+        query.update(keyset_filter(cursor, time_field="last_message_at", id_field="conversation_id"))
+    entries = await inbox_collection.find(query, {"_id": 0}).sort(
+        [("last_message_at", -1), ("conversation_id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    if len(entries) > limit:
+        entries = entries[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(entries[-1]["last_message_at"], entries[-1]["conversation_id"])
+    return [InboxEntry(**entry) for entry in entries]
+
+@api_router.get("/conversations/{conversation_id}/messages", response_model=List[Message])
+async def get_conversation_messages(conversation_id: str, response: Response, limit: int = 50, cursor: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """Messages newest first. Ones sent in the last moment may still be queued for writing."""
+    require_participant(conversation_id, current_user)
+    limit = clamp_page_size(limit)
+    query = {"conversation_id": conversation_id}
+    if cursor:
+        query.update(keyset_filter(cursor))
+    messages = await messages_collection.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    if len(messages) > limit:
+        messages = messages[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(messages[-1]["created_at"], messages[-1]["id"])
+    return [Message(**parse_from_mongo(message)) for message in messages]
+
+@api_router.post("/conversations/{conversation_id}/read", response_model=InboxEntry)
+async def mark_conversation_read(conversation_id: str, current_user: User = Depends(get_current_user)):
+    require_participant(conversation_id, current_user)
+    entry = await inbox_collection.find_one_and_update(
+        {"user_id": current_user.id, "conversation_id": conversation_id},
+        {"$set": {"unread_count": 0}},
+        projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    if not entry:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return InboxEntry(**entry)
+
+# Browsers cannot set headers on a WebSocket and query strings end up in access
+# logs, so the JWT rides in Sec-WebSocket-Protocol: new WebSocket(url, ["bearer", token])
+WS_AUTH_SUBPROTOCOL = "bearer"
+
+def websocket_token(websocket: WebSocket) -> Optional[str]:
+    protocols = [protocol.strip() for protocol in websocket.headers.get("sec-websocket-protocol", "").split(",")]
+    if len(protocols) == 2 and protocols[0] == WS_AUTH_SUBPROTOCOL:
+        return protocols[1]
+    return None
+
+@api_router.websocket("/ws/messages")
+async def messages_socket(websocket: WebSocket):
+    """1:1 messaging, authenticated with the ["bearer", token] subprotocol pair.
+
+    Send {"to": "<username>", "content": "..."}; every message the user sends
+    or receives arrives as {"type": "message", "message": {...}}.
+    """
+    token = websocket_token(websocket)
+    try:
+        if token is None:
+            raise HTTPException(status_code=401, detail="Missing token")
+        user = await get_user_from_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept(subprotocol=WS_AUTH_SUBPROTOCOL)
+    message_hub.register(user.id, websocket)
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON"})
+                continue
+            recipient_username = data.get("to") if isinstance(data, dict) else None
+            content = data.get("content") if isinstance(data, dict) else None
+            if not isinstance(recipient_username, str) or not isinstance(content, str) or not content.strip():
+                await websocket.send_json({"type": "error", "detail": "Expected {\"to\": username, \"content\": text}"})
+                continue
+            try:
+                recipient = await get_message_recipient(user, recipient_username, content)
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "detail": e.detail})
+                continue
+            try:
+                await send_direct_message(user, recipient, content)
+            except PyMongoError as e:
+                logger.error(f"Direct message from {user.id} failed: {e}")
+                await websocket.send_json({"type": "error", "detail": "Message could not be sent, try again"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        message_hub.unregister(user.id, websocket)
+
+# Live Feed Routes
+@api_router.get("/stream/posts")
+async def stream_posts():
+    """New posts and like/comment count changes as Server-Sent Events.
+
+    Events: `post` (a Post) and `post_counts` ({"post_id", "likes"} or
+    {"post_id", "comments"}). Clients load the first page from /posts once
+    and apply these instead of polling.
+    """
+    queue = feed_broadcaster.connect()
+    return StreamingResponse(
+        feed_broadcaster.stream(queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # Health check endpoint
 @api_router.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "Khel Bhoomi API is running"}
 
+# Per-process runtime metrics; off in production unless METRICS_ENABLED=true,
+# like /docs, since they expose cache, pool and queue internals
+METRICS_ENABLED = os.environ.get(
+    'METRICS_ENABLED', 'false' if os.environ.get('ENVIRONMENT') == 'production' else 'true'
+).lower() == 'true'
+
+@api_router.get("/metrics")
+async def get_metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "user_cache": user_cache.stats(),
+        "lookup_single_flight": lookup_flights.stats(),
+        "user_search_cache": user_search_cache.stats(),
+        "trending": trending_tags.stats(),
+        "password_hasher": password_hasher.stats(),
+        "audit_writer": audit_writer.stats(),
+        "message_writer": message_writer.stats(),
+        "message_hub": message_hub.stats(),
+        "feed_stream": feed_broadcaster.stats(),
+        "response_cache": response_cache.stats(),
+        "pubsub": pubsub.stats(),
+        "signup_latency": signup_latency.stats(),
+        "mongo_pool": {**pool_stats.stats(), "options": mongo_client_options()},
+    }
+
 # Add CORS middleware first (before including routes)
 app.add_middleware(
     CORSMiddleware,
@@ -386,6 +2721,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Add a root route for testing
@@ -403,6 +2739,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+async def create_db_indexes():
+    if os.environ.get('ENSURE_INDEXES_ON_STARTUP', 'true').lower() != 'true':
+        return
+    try:
+        report = await ensure_indexes(db)
+    except PyMongoError as e:
+        logger.error(f"Index bootstrap skipped, database unavailable: {e}")
+        return
+    for entry in report:
+        if entry["status"] == "failed":
+            logger.error(f"Index {entry['collection']}.{entry['index']} failed: {entry['error']}")
+        elif entry["status"] == "created":
+            logger.info(f"Index {entry['collection']}.{entry['index']} created")
+    counts = {status: sum(1 for entry in report if entry["status"] == status) for status in ("created", "exists", "failed")}
+    logger.info(f"Index bootstrap complete: {counts['created']} created, {counts['exists']} existing, {counts['failed']} failed")
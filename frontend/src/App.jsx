@@ -1886,6 +1886,24 @@ const Feed = () => {
 
   useEffect(() => {
     fetchPosts();
+
+    // Live updates instead of re-fetching the page
+    const source = new EventSource(`${API}/stream/posts`);
+    let connectedBefore = false;
+    source.onopen = () => {
+      // Events sent while disconnected are lost, so catch up after a reconnect
+      if (connectedBefore) fetchPosts();
+      connectedBefore = true;
+    };
+    source.addEventListener('post', (event) => {
+      const post = JSON.parse(event.data);
+      setPosts(prev => prev.some(p => p.id === post.id) ? prev : [post, ...prev]);
+    });
+    source.addEventListener('post_counts', (event) => {
+      const { post_id, ...counts } = JSON.parse(event.data);
+      setPosts(prev => prev.map(p => p.id === post_id ? { ...p, ...counts } : p));
+    });
+    return () => source.close();
   }, []);
 
   const fetchPosts = async () => {
@@ -1903,7 +1921,8 @@ const Feed = () => {
     setLoading(true);
     try {
       const response = await axios.post(`${API}/posts`, newPost);
-      setPosts([response.data, ...posts]);
+      // The stream may have delivered it already
+      setPosts(prev => prev.some(p => p.id === response.data.id) ? prev : [response.data, ...prev]);
       setNewPost({ content: '', post_type: 'text', sports_tags: [] });
       toast({
         title: "Post created!",
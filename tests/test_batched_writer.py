@@ -0,0 +1,64 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+import server
+
+
+class FlakyCollection:
+    """Fails the first `failures` inserts, then stores documents by id"""
+
+    def __init__(self, failures, error=None):
+        self.failures = failures
+        self.error = error or AutoReconnect("primary stepped down")
+        self.stored = {}
+
+    async def insert_many(self, documents, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            for document in documents[:1]:
+                self.stored[document["id"]] = document
+            raise self.error
+        errors = []
+        for index, document in enumerate(documents):
+            if document["id"] in self.stored:
+                errors.append({"index": index, "code": 11000})
+            self.stored[document["id"]] = document
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(documents) - len(errors)})
+
+
+def flush(writer, collection, documents, monkeypatch):
+    monkeypatch.setattr(server, "db", {"messages": collection})
+    asyncio.run(writer._flush([("messages", document) for document in documents]))
+
+
+def test_failed_batch_is_retried_until_written(monkeypatch):
+    writer = server.BatchedWriter("test", max_batch=10, flush_interval=0.01, max_queue=10, max_retries=3, retry_backoff=0)
+    collection = FlakyCollection(failures=2)
+
+    flush(writer, collection, [{"id": "a"}, {"id": "b"}], monkeypatch)
+
+    assert set(collection.stored) == {"a", "b"}
+    assert writer.stats()["failed"] == 0
+    assert writer.stats()["written"] == 2
+    assert writer.stats()["retried"] == 4
+
+
+def test_batch_is_counted_as_failed_once_retries_run_out(monkeypatch):
+    writer = server.BatchedWriter("test", max_batch=10, flush_interval=0.01, max_queue=10, max_retries=1, retry_backoff=0)
+
+    flush(writer, FlakyCollection(failures=5), [{"id": "a"}, {"id": "b"}], monkeypatch)
+
+    assert writer.stats()["failed"] == 2
+    assert writer.stats()["written"] == 0
+
+
+def test_without_retries_a_failed_batch_is_not_retried(monkeypatch):
+    writer = server.BatchedWriter("test", max_batch=10, flush_interval=0.01, max_queue=10)
+    collection = FlakyCollection(failures=1)
+
+    flush(writer, collection, [{"id": "a"}], monkeypatch)
+
+    assert writer.stats()["failed"] == 1
+    assert writer.stats()["retried"] == 0
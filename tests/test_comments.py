@@ -0,0 +1,23 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.mark.parametrize("content,detail", [
+    ("", "Comment is empty"),
+    ("   \n", "Comment is empty"),
+    ("x" * (server.MAX_COMMENT_LENGTH + 1), "Comment too long"),
+])
+def test_comment_content_is_validated_before_any_write(content, detail):
+    server.user_cache.set("commenter", server.User(username="commenter", email="commenter@example.com", role="fan", full_name="Commenter"))
+    token = server.create_access_token({"sub": "commenter"})
+
+    response = TestClient(server.app).post(
+        "/api/posts/some-post/comments",
+        json={"content": content},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
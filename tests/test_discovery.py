@@ -0,0 +1,25 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.mark.parametrize("days", ["nan", "inf", "0", "-1", str(server.MAX_ACTIVE_WITHIN_DAYS + 1)])
+def test_discovery_rejects_out_of_range_activity_windows(days):
+    server.user_cache.set("scout_user", server.User(username="scout_user", email="scout@example.com", role="scout", full_name="Scout"))
+    token = server.create_access_token({"sub": "scout_user"})
+
+    response = TestClient(server.app).get(
+        "/api/discover/athletes",
+        params={"active_within_days": days},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 422
+
+
+def test_activity_window_filters_on_last_active_at():
+    query = server.athlete_discovery_query(active_within_days=7)
+
+    assert set(query) == {"role", "last_active_at"}
+    assert "$gte" in query["last_active_at"]
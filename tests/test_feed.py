@@ -0,0 +1,128 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import server
+
+
+def at(minutes):
+    return datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minutes)
+
+
+def test_merge_orders_newest_first_and_reports_overflow():
+    candidates = [(at(1), "a"), (at(3), "c"), (at(2), "b")]
+
+    page, more = server.merge_feed_candidates(candidates, limit=2)
+
+    assert page == [(at(3), "c"), (at(2), "b")]
+    assert more is True
+
+
+def test_merge_breaks_timestamp_ties_by_post_id():
+    page, more = server.merge_feed_candidates([(at(1), "a"), (at(1), "b")], limit=5)
+
+    assert [post_id for _, post_id in page] == ["b", "a"]
+    assert more is False
+
+
+def test_merge_deduplicates_posts_from_both_sources():
+    # A post from an author who just crossed the celebrity threshold
+    candidates = [(at(2), "x"), (at(1), "y"), (at(2), "x")]
+
+    page, more = server.merge_feed_candidates(candidates, limit=2)
+
+    assert page == [(at(2), "x"), (at(1), "y")]
+    assert more is False
+
+
+def test_merge_compares_iso_strings_with_native_dates():
+    # Timeline entries not yet migrated while posts already are
+    candidates = [(at(1).isoformat(), "old"), (at(3), "new"), (at(2).isoformat().replace("+00:00", "Z"), "mid")]
+
+    page, _ = server.merge_feed_candidates(candidates, limit=3)
+
+    assert [post_id for _, post_id in page] == ["new", "mid", "old"]
+
+
+def test_cursor_resumes_after_last_item(monkeypatch):
+    page, _ = server.merge_feed_candidates([(at(2), "b"), (at(1), "a")], limit=1)
+    cursor = server.encode_cursor(*page[-1])
+
+    monkeypatch.setattr(server, "DATETIME_STORAGE", "native")
+    assert server.keyset_filter(cursor, id_field="post_id") == {"$or": [
+        {"created_at": {"$lt": at(2)}},
+        {"created_at": at(2), "post_id": {"$lt": "b"}},
+    ]}
+
+    monkeypatch.setattr(server, "DATETIME_STORAGE", "iso")
+    assert server.keyset_filter(cursor, id_field="post_id") == {"$or": [
+        {"created_at": {"$lt": at(2).isoformat()}},
+        {"created_at": at(2).isoformat(), "post_id": {"$lt": "b"}},
+    ]}
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(server.HTTPException) as excinfo:
+        server.keyset_filter("not-a-cursor")
+
+    assert excinfo.value.status_code == 400
+
+
+def test_cursor_fields_cannot_carry_query_operators():
+    raw = json.dumps({"c": {"$gt": ""}, "i": {"$ne": None}}).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    clauses = server.keyset_filter(cursor)["$or"]
+
+    assert isinstance(clauses[0]["created_at"]["$lt"], str)
+    assert isinstance(clauses[1]["created_at"], str)
+    assert isinstance(clauses[1]["id"]["$lt"], str)
+
+
+class FakeProfiles:
+    async def find_one(self, *args, **kwargs):
+        return {"followers_count": 50}
+
+
+class FakeFollows:
+    def __init__(self, count):
+        self.count = count
+
+    async def _edges(self):
+        for n in range(self.count):
+            yield {"follower_id": f"follower-{n}"}
+
+    def find(self, *args, **kwargs):
+        return self._edges()
+
+
+def test_fan_out_trims_a_bounded_number_of_timelines_at_once(monkeypatch):
+    running = 0
+    peak = 0
+    trimmed = []
+
+    async def trim_timeline(user_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        trimmed.append(user_id)
+        running -= 1
+
+    async def insert_timeline_entries(entries):
+        pass
+
+    monkeypatch.setattr(server, "profile_collection", FakeProfiles(), raising=False)
+    monkeypatch.setattr(server, "follows_collection", FakeFollows(50), raising=False)
+    monkeypatch.setattr(server, "trim_timeline", trim_timeline)
+    monkeypatch.setattr(server, "insert_timeline_entries", insert_timeline_entries)
+    monkeypatch.setattr(server, "TIMELINE_TRIM_INTERVAL", 1)
+    monkeypatch.setattr(server, "TIMELINE_TRIM_CONCURRENCY", 4)
+
+    asyncio.run(server.fan_out_post("post-1", "author", at(0)))
+
+    assert len(trimmed) == 51
+    assert peak == 4
@@ -0,0 +1,40 @@
+import numpy as np
+
+import compute_follow_suggestions as cfs
+
+
+def users_with(*sport_lists):
+    return [{"sport_terms": sports} for sports in sport_lists]
+
+
+def test_group_similarity_matches_dense_jaccard():
+    rng = np.random.default_rng(3)
+    sports = [f"sport{i}" for i in range(12)]
+    users = users_with(*[list(rng.choice(sports, size=rng.integers(0, 5), replace=False)) for _ in range(200)])
+
+    group, keys, postings, _ = cfs.sport_groups(users)
+    sizes = np.array([len(key) for key in keys], dtype=np.float64)
+
+    for g, key in enumerate(keys):
+        expected = [
+            len(set(key) & set(other)) / len(set(key) | set(other)) if set(key) | set(other) else 0.0
+            for other in keys
+        ]
+        assert np.allclose(cfs.group_similarity(key, sizes, postings), expected)
+
+
+def test_pools_draw_on_the_most_similar_groups_first():
+    users = users_with(["cricket"], ["cricket", "kabaddi"], ["football"], [])
+    group, keys, postings, _ = cfs.sport_groups(users)
+    sizes = np.array([len(key) for key in keys], dtype=np.float64)
+    role = np.zeros(len(users), dtype=np.int64)
+    popularity = np.array([0.1, 0.2, 0.9, 0.5])
+    members, popular = cfs.group_members(group, role, popularity, len(keys))
+
+    cricket = cfs.group_similarity(keys[group[0]], sizes, postings)
+    pool = cfs.candidate_pools(cricket, members, popular)[0]
+
+    # Own group, then the overlapping group; football shares nothing and only
+    # arrives through the most-followed-overall tail
+    assert list(pool[:2]) == [0, 1]
+    assert list(pool[2:]) == list(np.argsort(-popularity, kind="stable"))
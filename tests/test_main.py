@@ -0,0 +1,15 @@
+import main
+
+
+def test_memory_pubsub_runs_a_single_worker(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.delenv("PUBSUB_BACKEND", raising=False)
+
+    assert main.production_workers() == 1
+
+
+def test_shared_pubsub_keeps_the_configured_workers(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setenv("PUBSUB_BACKEND", "redis")
+
+    assert main.production_workers() == 4
@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import server
+
+
+def connect(client, username="socket_user"):
+    # Seeding the user cache lets the token check pass without a database
+    server.user_cache.set(username, server.User(username=username, email=f"{username}@example.com", role="fan", full_name="Socket User"))
+    token = server.create_access_token({"sub": username})
+    return client.websocket_connect("/api/ws/messages", subprotocols=["bearer", token])
+
+
+def test_non_json_frame_gets_an_error_frame_and_keeps_the_socket_open():
+    with connect(TestClient(server.app)) as websocket:
+        websocket.send_text("not json")
+        assert websocket.receive_json() == {"type": "error", "detail": "Frames must be JSON"}
+
+        websocket.send_json(["wrong", "shape"])
+        assert websocket.receive_json()["type"] == "error"
+
+
+def test_socket_accepts_the_bearer_subprotocol():
+    with connect(TestClient(server.app)) as websocket:
+        assert websocket.accepted_subprotocol == "bearer"
+
+
+@pytest.mark.parametrize("subprotocols", [["bearer", "bad"], [], ["chat"]])
+def test_missing_or_invalid_token_is_rejected(subprotocols):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with TestClient(server.app).websocket_connect("/api/ws/messages", subprotocols=subprotocols):
+            pass
+
+    assert excinfo.value.code == server.status.WS_1008_POLICY_VIOLATION
+
+
+def test_token_in_query_string_is_not_accepted():
+    server.user_cache.set("socket_user", server.User(username="socket_user", email="socket_user@example.com", role="fan", full_name="Socket User"))
+    token = server.create_access_token({"sub": "socket_user"})
+
+    with pytest.raises(WebSocketDisconnect):
+        with TestClient(server.app).websocket_connect(f"/api/ws/messages?token={token}"):
+            pass
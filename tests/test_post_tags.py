@@ -0,0 +1,59 @@
+import asyncio
+
+from bson import ObjectId
+
+import backfill_post_tags
+import server
+
+
+def test_tags_are_lowercased_stripped_and_deduplicated():
+    assert server.normalize_tags(["#Cricket", " cricket ", "Kabaddi", "#", ""]) == ["cricket", "kabaddi"]
+
+
+class FakeFind:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return [dict(doc) for doc in self.docs]
+
+
+class FakeResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+
+class FakePosts:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        after = query.get("_id", {}).get("$gt")
+        return FakeFind([doc for doc in sorted(self.docs, key=lambda doc: doc["_id"]) if after is None or doc["_id"] > after])
+
+    async def bulk_write(self, updates, ordered):
+        for update in updates:
+            for doc in self.docs:
+                if doc["_id"] == update._filter["_id"] and doc["sports_tags"] == update._filter["sports_tags"]:
+                    doc.update(update._doc["$set"])
+        return FakeResult(len(updates))
+
+
+def test_backfill_normalises_legacy_tags_and_is_rerunnable(monkeypatch):
+    posts = FakePosts([
+        {"_id": ObjectId(), "sports_tags": ["#Cricket", "IPL"]},
+        {"_id": ObjectId(), "sports_tags": ["football"]},
+        {"_id": ObjectId(), "sports_tags": ["Football", "football"]},
+    ])
+    monkeypatch.setattr(server, "posts_collection", posts, raising=False)
+
+    assert asyncio.run(backfill_post_tags.backfill_post_tags(batch_size=2, dry_run=False)) == 2
+    assert [doc["sports_tags"] for doc in posts.docs] == [["cricket", "ipl"], ["football"], ["football"]]
+    assert asyncio.run(backfill_post_tags.backfill_post_tags(batch_size=2, dry_run=False)) == 0
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.mark.parametrize("hours", ["nan", "inf", "-1", "0"])
+def test_trending_rejects_hours_that_are_not_positive_and_finite(hours):
+    response = TestClient(server.app).get("/api/trending", params={"hours": hours})
+
+    assert response.status_code == 422
+
+
+def test_shorter_window_sums_only_its_buckets():
+    trending = server.TrendingTags(bucket_seconds=300, bucket_count=12)
+    now = datetime.now(timezone.utc)
+    trending.record(["cricket", "football"], now)
+    trending.record(["cricket"], now - timedelta(minutes=30))
+
+    assert trending.top(10, hours=1) == [("cricket", 2), ("football", 1)]
+    assert trending.top(10, hours=0.1) == [("cricket", 1), ("football", 1)]
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+import server
+
+mongomock = pytest.importorskip("mongomock")
+
+
+class AsyncFind:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    async def to_list(self, length):
+        return list(self.cursor)
+
+
+class AsyncCollection:
+    """Just enough of Motor's API over a mongomock collection for find_user_suggestions"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncFind(self.collection.find(*args, **kwargs))
+
+
+@pytest.fixture
+def users(monkeypatch):
+    collection = mongomock.MongoClient().db.users
+    for username, full_name in [("zara", "Ali Zara"), ("bob", "Bob Smith"), ("virat", "Virat Kohli")]:
+        collection.insert_one({
+            "id": username, "username": username, "full_name": full_name, "role": "athlete",
+            "profile_image": "", "search_terms": server.user_search_terms(username, full_name),
+        })
+    monkeypatch.setattr(server, "users_collection", AsyncCollection(collection), raising=False)
+    return collection
+
+
+def test_prefix_with_no_matching_term_returns_nothing(users):
+    assert asyncio.run(server.find_user_suggestions("kohlx", 10)) == []
+
+
+def test_prefix_matches_only_users_with_a_term_starting_with_it(users):
+    suggestions = asyncio.run(server.find_user_suggestions("kohl", 10))
+
+    assert [user["username"] for user in suggestions] == ["virat"]